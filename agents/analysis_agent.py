@@ -2,6 +2,8 @@ from langchain.chat_models import init_chat_model
 import os
 from dotenv import load_dotenv
 
+from telemetry.spans import count, span
+
 
 class AgentAnalysis:
     """
@@ -18,12 +20,13 @@ class AgentAnalysis:
         
         load_dotenv(dotenv_path)
         print("ok ça marche")
+        self.model_name = "gemini-2.5-flash"
         self.model = init_chat_model(
-            "gemini-2.5-flash",
+            self.model_name,
             model_provider="google_genai"
     )
 
-    def analyze(
+    def build_prompt(
         self,
         question: str,
         claim: str,
@@ -35,7 +38,7 @@ class AgentAnalysis:
         good_answer : str
     ) -> str:
         """
-        Compare RAG vs RAG + NLI Subclaim results and explain differences.
+        Build the comparison prompt sent to the LLM.
         """
 
         prompt = (
@@ -71,8 +74,80 @@ class AgentAnalysis:
             f"Be concise and direct."
         )
 
-        response = self.model.invoke(
-            [{"role": "user", "content": prompt}]
+        return prompt
+
+    def analyze(
+        self,
+        question: str,
+        claim: str,
+        rag_passages: list[str],
+        rag_answer: str,
+        subclaims: list[str],
+        nli_passages: list[str],
+        nli_answer: str,
+        good_answer : str
+    ) -> str:
+        """
+        Compare RAG vs RAG + NLI Subclaim results and explain differences.
+        """
+        prompt = self.build_prompt(
+            question=question,
+            claim=claim,
+            rag_passages=rag_passages,
+            rag_answer=rag_answer,
+            subclaims=subclaims,
+            nli_passages=nli_passages,
+            nli_answer=nli_answer,
+            good_answer=good_answer
         )
 
+        with span("analysis"):
+            response = self.model.invoke(
+                [{"role": "user", "content": prompt}]
+            )
+        self.count_tokens(response)
+
         return response.content.strip()
+
+    async def aanalyze(
+        self,
+        question: str,
+        claim: str,
+        rag_passages: list[str],
+        rag_answer: str,
+        subclaims: list[str],
+        nli_passages: list[str],
+        nli_answer: str,
+        good_answer : str
+    ) -> str:
+        """
+        Async version of analyze, so the API can await the LLM call
+        without holding an inference worker or blocking the event loop.
+        """
+        prompt = self.build_prompt(
+            question=question,
+            claim=claim,
+            rag_passages=rag_passages,
+            rag_answer=rag_answer,
+            subclaims=subclaims,
+            nli_passages=nli_passages,
+            nli_answer=nli_answer,
+            good_answer=good_answer
+        )
+
+        with span("analysis"):
+            response = await self.model.ainvoke(
+                [{"role": "user", "content": prompt}]
+            )
+        self.count_tokens(response)
+
+        return response.content.strip()
+
+    @staticmethod
+    def count_tokens(response):
+        """
+        Record the LLM token usage reported with the response, when available.
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        count("analysis_tokens_in", usage.get("input_tokens", 0))
+        count("analysis_tokens_out", usage.get("output_tokens", 0))
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _BatchRequest:
+    """
+    Items submitted by one caller, and the future receiving their results.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler around a batched model function.
+
+    Several threads (e.g. concurrent API requests running on the
+    inference pool) submit lists of items. A dedicated thread merges
+    them into one call of fn, flushed as soon as max_batch_size items
+    are pending or max_wait_ms has elapsed since the first one, and
+    routes each slice of the results back to its caller.
+
+    fn must take a list of items and return one result per item,
+    in the same order (e.g. NLIModel.predict, Generator.generate_batch).
+    """
+
+    def __init__(self, fn, max_batch_size=32, max_wait_ms=10, name="batcher"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.queue = queue.Queue()
+
+        self.batches = 0
+        self.items = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, items):
+        """
+        Submit items and block until their results are available.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        request = _BatchRequest(items)
+        self.queue.put(request)
+
+        return request.future.result()
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0].items)
+            deadline = time.monotonic() + self.max_wait
+
+            # Collect concurrent requests until the batch is full or the wait expires
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.items)
+
+            self._run(batch)
+
+    def _run(self, batch):
+        items = [item for request in batch for item in request.items]
+
+        try:
+            results = self.fn(items)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        with self.lock:
+            self.batches += 1
+            self.items += len(items)
+            self.requests += len(batch)
+
+        start = 0
+        for request in batch:
+            end = start + len(request.items)
+            request.future.set_result(results[start:end])
+            start = end
+
+    def stats(self):
+        """
+        How many requests and items were merged into how many batches.
+        """
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "pending": self.queue.qsize(),
+            }
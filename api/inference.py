@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry.metrics import REGISTRY
+
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "rag_inference_queue_wait_seconds",
+    "Time jobs wait for an inference worker",
+)
+
+
+class QueueFullError(Exception):
+    """
+    Raised when the inference pool cannot accept more work.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("Inference queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Bounded pool of worker threads running model inference.
+
+    At most max_workers jobs run at the same time and at most max_queue
+    jobs wait for a worker. Beyond that, submissions are rejected with
+    QueueFullError so the API can answer 503 instead of piling up work.
+
+    Jobs run outside of the event loop, so a long inference never
+    blocks other endpoints or static files.
+    """
+
+    def __init__(self, max_workers=2, max_queue=8, retry_after=5):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="inference"
+        )
+
+        # Jobs submitted and not finished yet (running + queued)
+        self.in_flight = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on a worker thread and await its result.
+
+        The job runs in a copy of the caller's context, so its spans
+        are recorded in the caller's request trace.
+        """
+        with self.lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(self.retry_after)
+            self.in_flight += 1
+
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def job():
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+            return context.run(fn, *args, **kwargs)
+
+        try:
+            future = self.executor.submit(job)
+        except BaseException:
+            self._release()
+            raise
+
+        # Release the slot when the job ends, even if the request was cancelled
+        future.add_done_callback(lambda _: self._release())
+
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        """
+        Current load of the pool.
+        """
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": min(self.in_flight, self.max_workers),
+                "queued": max(0, self.in_flight - self.max_workers),
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,14 @@
+import asyncio
+import hmac
+import json
+import os
 import pickle
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -12,10 +18,36 @@ from nli.nli_class import NLIModel
 from pipelines.rag_baseline import RAGBaseline
 from pipelines.rag_nli_subclaim import RAG_NLI_Subclaim
 from agents.analysis_agent import AgentAnalysis
+from api.inference import InferencePool, QueueFullError
+from api.batching import MicroBatcher
+from api.response_cache import ResponseCache
+from api.startup import StartupManager, ComponentNotReady
+from telemetry.metrics import REGISTRY
+from telemetry.spans import span, trace
 
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Load models in the background so the server binds its port immediately.
+    Readiness is reported by /readyz.
+    """
+    startup_done = components.start()
+
+    warmup_task = None
+    # Optional background precomputation, enabled with PRECOMPUTE_RESPONSES=1
+    if os.environ.get("PRECOMPUTE_RESPONSES", "0") == "1":
+        warmup_task = asyncio.create_task(precompute_responses(startup_done))
+
+    yield
+
+    if warmup_task is not None:
+        warmup_task.cancel()
+    inference_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow cross-origin requests from the frontend (development setup)
 app.add_middleware(
@@ -28,6 +60,26 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "rag_http_request_seconds",
+    "Latency of HTTP requests by route",
+    labels=("method", "route", "status"),
+)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route template rather than raw path, to keep the label set bounded
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
+
 QA_DATA = [
     {
         "id": 0,
@@ -55,25 +107,174 @@ QA_DATA = [
     },
 ]
 
-# Global initialization to avoid reloading heavy models on each request
-print("Initializing models and pipelines...")
+# Heavy components are loaded once, concurrently, in background threads
+# (see api.startup). Each model runs one warm-up inference before being
+# reported as ready.
+batch_max_wait_ms = float(os.environ.get("BATCH_MAX_WAIT_MS", 10))
 
-with open("data/hotpotqa_300.pkl", "rb") as f:
-    dataset = pickle.load(f)
+def load_dataset():
+    with open("data/hotpotqa_300.pkl", "rb") as f:
+        return pickle.load(f)
 
-retriever = BasicRetriever(dataset)
-nli_model = NLIModel()
-generator = Generator(model_name="google/flan-t5-small")
+def load_nli_model():
+    # One size for merged batches and forward passes, so a merged batch
+    # is not split again into several passes by NLIModel.predict
+    batch_size = int(os.environ.get("NLI_BATCH_MAX_SIZE", 32))
+    nli_model = NLIModel(
+        batch_size=batch_size,
+        cache_path="data/nli_cache.sqlite",
+        backend=os.environ.get("NLI_BACKEND", "torch"),
+        cascade_model=os.environ.get("NLI_CASCADE_MODEL") or None,
+        max_premise_tokens=int(os.environ["NLI_MAX_PREMISE_TOKENS"]) if "NLI_MAX_PREMISE_TOKENS" in os.environ else None,
+    )
 
-rag_pipeline = RAGBaseline(retriever, generator, top_k=2)
-rag_nli_pipeline = RAG_NLI_Subclaim(retriever, generator, nli_model, top_k=2)
+    # Forward passes of concurrent requests are merged into shared batches,
+    # flushed on max batch size or max wait
+    nli_model.batcher = MicroBatcher(
+        nli_model.predict,
+        max_batch_size=batch_size,
+        max_wait_ms=batch_max_wait_ms,
+        name="nli-batcher",
+    )
+    return nli_model
 
-analyzer = AgentAnalysis()
+def load_generator():
+    # Same for generation and Generator.generate_batch
+    batch_size = int(os.environ.get("GEN_BATCH_MAX_SIZE", 16))
+    generator = Generator(model_name="google/flan-t5-small", batch_size=batch_size)
+    generator.batcher = MicroBatcher(
+        generator.generate_batch,
+        max_batch_size=batch_size,
+        max_wait_ms=batch_max_wait_ms,
+        name="generation-batcher",
+    )
+    return generator
 
-print("Initialization completed")
+components = StartupManager()
+components.register("dataset", load_dataset)
+components.register(
+    "retriever",
+    lambda dataset: BasicRetriever(dataset, cache_dir="data/index_cache"),
+    warmup=lambda retriever: retriever.retriever_chunk("warm-up query"),
+    requires=("dataset",),
+)
+components.register(
+    "nli_model",
+    load_nli_model,
+    # Call the model directly, so the warm-up pair does not go into the cache
+    warmup=lambda nli_model: nli_model.predict([("warm-up premise.", "warm-up hypothesis.")]),
+)
+components.register(
+    "generator",
+    load_generator,
+    warmup=lambda generator: generator.generate_batch(["Question: warm-up\nAnswer:"]),
+)
+components.register(
+    "nli_tokens",
+    # Tokenize every corpus chunk once for NLI, next to the index
+    lambda retriever, nli_model: nli_model.pretokenize(retriever.chunks),
+    requires=("retriever", "nli_model"),
+)
+components.register("analyzer", AgentAnalysis)
+components.register(
+    "rag_pipeline",
+    lambda retriever, generator: RAGBaseline(retriever, generator, top_k=2),
+    requires=("retriever", "generator"),
+)
+components.register(
+    "rag_nli_pipeline",
+    lambda retriever, generator, nli_model: RAG_NLI_Subclaim(retriever, generator, nli_model, top_k=2),
+    requires=("retriever", "generator", "nli_model"),
+)
+
+# Model inference runs on a bounded pool of worker threads, outside the event loop
+inference_pool = InferencePool(
+    max_workers=int(os.environ.get("INFERENCE_WORKERS", 4)),
+    max_queue=int(os.environ.get("INFERENCE_QUEUE_SIZE", 8)),
+    retry_after=int(os.environ.get("INFERENCE_RETRY_AFTER", 5)),
+)
+
+# Full responses for the fixed QA_DATA questions, keyed on question id and config
+response_cache = ResponseCache(
+    max_size=int(os.environ.get("RESPONSE_CACHE_SIZE", 128)),
+    ttl=int(os.environ.get("RESPONSE_CACHE_TTL", 3600)),
+)
+# Responses being computed, so concurrent identical requests share one computation
+responses_in_flight = {}
+
+REGISTRY.gauge(
+    "rag_inference_pool_jobs",
+    "Jobs running or queued on the inference pool",
+    lambda: {state: inference_pool.stats()[state] for state in ("running", "queued")},
+    labels=("state",),
+)
+REGISTRY.gauge(
+    "rag_inference_pool_rejected",
+    "Jobs rejected because the inference queue was full",
+    lambda: inference_pool.stats()["rejected"],
+)
+REGISTRY.gauge(
+    "rag_response_cache_entries",
+    "Cached /api/analyze responses",
+    lambda: len(response_cache.entries),
+)
+REGISTRY.gauge(
+    "rag_retriever_documents",
+    "Chunks in the retriever index",
+    lambda: components.get("retriever").num_documents() if components.is_ready() else None,
+)
+
+def config_signature():
+    """
+    Everything that changes the response of a given question.
+    """
+    retriever = components.get("retriever")
+    nli_model = components.get("nli_model")
+    return "|".join([
+        f"retriever={retriever.model_name}:{retriever.index_type}:v{retriever.version}:top_k={components.get('rag_pipeline').top_k}",
+        f"nli={nli_model.signature()}:top_k={components.get('rag_nli_pipeline').top_k}",
+        f"generator={components.get('generator').model_name}",
+        f"analyzer={components.get('analyzer').model_name}",
+    ])
 
 class QuestionRequest(BaseModel):
     question_id: int
+    # Add a per-stage timing breakdown of this request to the response
+    timings: bool = False
+
+class InvalidateRequest(BaseModel):
+    question_id: int | None = None
+
+class AddDocumentsRequest(BaseModel):
+    texts: list[str]
+
+class RemoveDocumentsRequest(BaseModel):
+    ids: list[int]
+
+def admin_forbidden(token):
+    """
+    403 response unless the X-Admin-Token header matches ADMIN_TOKEN, None otherwise.
+    Admin endpoints stay disabled while ADMIN_TOKEN is not set.
+    """
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        error = "Admin endpoints are disabled, set ADMIN_TOKEN to enable them"
+    elif token is None or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        error = "Invalid admin token"
+    else:
+        return None
+    return JSONResponse(status_code=403, content={"success": False, "error": error})
+
+def service_unavailable(e):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(e.retry_after)},
+        content={
+            "success": False,
+            "error": str(e),
+            "retry_after": e.retry_after
+        }
+    )
 
 @app.get("/")
 async def root():
@@ -92,10 +293,389 @@ async def get_questions():
         ]
     }
 
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and serving, models may still be loading.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 once every component is loaded and warmed up, 503 before.
+    Includes the status and load time of each component.
+    """
+    status = components.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Load of the inference pool, micro-batching and NLI cache counters.
+    """
+    stats = {
+        "inference_pool": inference_pool.stats(),
+        "response_cache": response_cache.stats(),
+    }
+    if components.is_ready():
+        nli_model = components.get("nli_model")
+        stats["nli_batcher"] = nli_model.batcher.stats()
+        stats["generation_batcher"] = components.get("generator").batcher.stats()
+        stats["nli_cache"] = nli_model.cache.stats()
+        retriever = components.get("retriever")
+        stats["retriever"] = {"documents": retriever.num_documents(), "version": retriever.version}
+        stats["nli_filter"] = dict(nli_model.filter_stats)
+        if nli_model.cascade is not None:
+            stats["nli_cascade"] = nli_model.cascade.stats()
+    return stats
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Stage latency histograms, item counters and load gauges, in Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache(request: InvalidateRequest, x_admin_token: str | None = Header(default=None)):
+    """
+    Drop cached responses, for one question or for all of them.
+    Admin only: every dropped response costs a full pipeline run to recompute.
+    """
+    forbidden = admin_forbidden(x_admin_token)
+    if forbidden is not None:
+        return forbidden
+
+    removed = response_cache.invalidate(request.question_id)
+    return {"success": True, "removed": removed}
+
+def add_documents(texts):
+    """
+    Index new chunks and tokenize them for NLI (blocking, called on the inference pool).
+    """
+    ids = components.get("retriever").add_documents(texts)
+    components.get("nli_model").pretokenize(texts)
+    return ids
+
+@app.post("/api/admin/documents")
+async def add_documents_endpoint(request: AddDocumentsRequest, x_admin_token: str | None = Header(default=None)):
+    """
+    Add chunks to the live index, only the new chunks are encoded.
+    Cached responses are dropped since retrieval results may change.
+    "persisted" tells whether the update survives a restart (replayed
+    from the retriever cache entry, see BasicRetriever.log_update).
+    """
+    forbidden = admin_forbidden(x_admin_token)
+    if forbidden is not None:
+        return forbidden
+
+    try:
+        ids = await inference_pool.run(add_documents, request.texts)
+    except (QueueFullError, ComponentNotReady) as e:
+        return service_unavailable(e)
+
+    response_cache.invalidate()
+    retriever = components.get("retriever")
+    return {
+        "success": True,
+        "ids": ids,
+        "documents": retriever.num_documents(),
+        "persisted": retriever.updates_path is not None
+    }
+
+@app.post("/api/admin/documents/remove")
+async def remove_documents_endpoint(request: RemoveDocumentsRequest, x_admin_token: str | None = Header(default=None)):
+    """
+    Remove chunks from the live index by id ("persisted" as when adding).
+    """
+    forbidden = admin_forbidden(x_admin_token)
+    if forbidden is not None:
+        return forbidden
+
+    try:
+        retriever = components.get("retriever")
+        removed = await inference_pool.run(retriever.remove_documents, request.ids)
+    except (QueueFullError, ComponentNotReady) as e:
+        return service_unavailable(e)
+
+    response_cache.invalidate()
+    return {
+        "success": True,
+        "removed": removed,
+        "documents": retriever.num_documents(),
+        "persisted": retriever.updates_path is not None
+    }
+
+def run_pipelines(question, claim):
+    """
+    Run both pipelines for one question (blocking, called on the inference pool).
+    """
+    rag_pipeline = components.get("rag_pipeline")
+    rag_nli_pipeline = components.get("rag_nli_pipeline")
+
+    with span("pipeline_rag"):
+        rag_passages, rag_answer = rag_pipeline.answer_for_agent(question)
+    print(rag_answer)
+
+    with span("pipeline_rag_nli"):
+        (
+            subclaims,
+            passages_before_nli,
+            nli_passages,
+            nli_answer,
+            nli_verdicts
+        ) = rag_nli_pipeline.answer_for_agent(question, claim)
+
+    return rag_passages, rag_answer, subclaims, passages_before_nli, nli_passages, nli_answer, nli_verdicts
+
+def build_response(
+    qa, rag_passages, rag_answer, subclaims, passages_before_nli,
+    nli_passages, nli_answer, nli_verdicts, analysis_text
+):
+    """
+    JSON payload of /api/analyze, also cached and replayed by the stream endpoint.
+    """
+    return {
+        "success": True,
+        "question": qa["question"],
+        "claim": qa["claim"],
+        "good_answer": qa["good_answer"],
+        "rag": {
+            "passages_count": len(rag_passages) if isinstance(rag_passages, list) else 0,
+            "passages": rag_passages if isinstance(rag_passages, list) else [rag_passages],
+            "answer": rag_answer
+        },
+        "rag_nli": {
+            "subclaims": subclaims,
+            "passages_before": len(passages_before_nli) if isinstance(passages_before_nli, list) else 1,
+            "passages_after": len(nli_passages) if isinstance(nli_passages, list) else 0,
+            "passages": nli_passages if isinstance(nli_passages, list) else [nli_passages],
+            "verdicts": nli_verdicts,
+            "answer": nli_answer
+        },
+        "analysis": analysis_text
+    }
+
+async def compute_analysis(qa):
+    """
+    Run both pipelines on the inference pool, then the LLM analysis.
+    """
+    question = qa["question"]
+    claim = qa["claim"]
+    good_answer = qa["good_answer"]
+
+    (
+        rag_passages,
+        rag_answer,
+        subclaims,
+        passages_before_nli,
+        nli_passages,
+        nli_answer,
+        nli_verdicts
+    ) = await inference_pool.run(run_pipelines, question, claim)
+
+    analysis_text = await components.get("analyzer").aanalyze(
+        question=question,
+        claim=claim,
+        rag_passages=rag_passages,
+        rag_answer=rag_answer,
+        subclaims=subclaims,
+        nli_passages=nli_passages,
+        nli_answer=nli_answer,
+        good_answer=good_answer
+    )
+
+    return build_response(
+        qa, rag_passages, rag_answer, subclaims, passages_before_nli,
+        nli_passages, nli_answer, nli_verdicts, analysis_text
+    )
+
+async def get_analysis(qa):
+    """
+    Serve the response from the cache, or compute and cache it.
+
+    Concurrent requests for the same question share one computation.
+    """
+    key = (qa["id"], config_signature())
+
+    cached = response_cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    task = responses_in_flight.get(key)
+    if task is None:
+        async def compute_and_store():
+            response = await compute_analysis(qa)
+            response_cache.put(key, response)
+            return response
+
+        task = asyncio.ensure_future(compute_and_store())
+        responses_in_flight[key] = task
+        task.add_done_callback(lambda _: responses_in_flight.pop(key, None))
+
+    # A client disconnecting must not cancel the computation shared with others
+    response = await asyncio.shield(task)
+    return {**response, "cached": False}
+
+async def precompute_responses(startup_done):
+    """
+    Once the models are ready, fill the response cache for every
+    QA_DATA question, one at a time.
+    """
+    if not await asyncio.wrap_future(startup_done):
+        print("Response cache warm-up skipped: startup failed")
+        return
+
+    for qa in QA_DATA:
+        try:
+            await get_analysis(qa)
+        except Exception as e:
+            print(f"Warm-up failed for question {qa['id']}: {e}")
+    print("Response cache warm-up completed")
+
+def sse_event(event, data):
+    """
+    Format one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_generation(prompt):
+    """
+    Yield answer pieces of one prompt while it is generated on the inference pool.
+    """
+    loop = asyncio.get_running_loop()
+    pieces = asyncio.Queue()
+    generator = components.get("generator")
+
+    def produce():
+        for piece in generator.stream_answer(prompt):
+            loop.call_soon_threadsafe(pieces.put_nowait, piece)
+
+    job = asyncio.ensure_future(inference_pool.run(produce))
+    # End of stream marker, also sent if the job fails or is rejected
+    job.add_done_callback(lambda _: pieces.put_nowait(None))
+
+    while True:
+        piece = await pieces.get()
+        if piece is None:
+            break
+        yield piece
+
+    # Propagate a generation error or a full queue
+    await job
+
+async def stream_analysis(qa):
+    """
+    Stream the analysis of one question as Server-Sent Events:
+    retrieved passages, NLI verdicts, both answers piece by piece,
+    then the LLM analysis. Cached responses are replayed at once.
+    """
+    try:
+        cached = response_cache.get((qa["id"], config_signature()))
+        if cached is not None:
+            yield sse_event("passages", {"passages": cached["rag"]["passages"]})
+            yield sse_event("nli", {
+                "subclaims": cached["rag_nli"]["subclaims"],
+                "verdicts": cached["rag_nli"]["verdicts"],
+                "passages": cached["rag_nli"]["passages"],
+            })
+            yield sse_event("answer", {"pipeline": "rag", "answer": cached["rag"]["answer"]})
+            yield sse_event("answer", {"pipeline": "rag_nli", "answer": cached["rag_nli"]["answer"]})
+            yield sse_event("analysis", {"analysis": cached["analysis"]})
+            yield sse_event("done", {"cached": True})
+            return
+
+        question = qa["question"]
+        claim = qa["claim"]
+        rag_pipeline = components.get("rag_pipeline")
+        rag_nli_pipeline = components.get("rag_nli_pipeline")
+        nli_model = components.get("nli_model")
+
+        # Both pipelines use the same retriever and top_k, retrieve once
+        passages = await inference_pool.run(
+            rag_pipeline.retriever.retriever_chunk, question, rag_pipeline.top_k
+        )
+        yield sse_event("passages", {"passages": passages})
+
+        nli_result = await inference_pool.run(nli_model.nli_subclaim_filter, claim, passages)
+        yield sse_event("nli", {
+            "subclaims": nli_result["subclaims"],
+            "verdicts": nli_result["verdicts"],
+            "passages": nli_result["passages"],
+        })
+
+        answers = {}
+        for name, pipeline, context in (
+            ("rag", rag_pipeline, passages),
+            ("rag_nli", rag_nli_pipeline, nli_result["passages"]),
+        ):
+            prompt = pipeline.build_prompts([question], [context])[0]
+            pieces = []
+            async for piece in stream_generation(prompt):
+                pieces.append(piece)
+                yield sse_event("token", {"pipeline": name, "text": piece})
+            answers[name] = "".join(pieces).strip()
+            yield sse_event("answer", {"pipeline": name, "answer": answers[name]})
+
+        analysis_text = await components.get("analyzer").aanalyze(
+            question=question,
+            claim=claim,
+            rag_passages=passages,
+            rag_answer=answers["rag"],
+            subclaims=nli_result["subclaims"],
+            nli_passages=nli_result["passages"],
+            nli_answer=answers["rag_nli"],
+            good_answer=qa["good_answer"]
+        )
+        yield sse_event("analysis", {"analysis": analysis_text})
+
+        response_cache.put(
+            (qa["id"], config_signature()),
+            build_response(
+                qa, passages, answers["rag"], nli_result["subclaims"], passages,
+                nli_result["passages"], answers["rag_nli"], nli_result["verdicts"], analysis_text
+            )
+        )
+        yield sse_event("done", {"cached": False})
+
+    except (QueueFullError, ComponentNotReady) as e:
+        yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+
+    except Exception as e:
+        import traceback
+        print(traceback.format_exc())
+        yield sse_event("error", {"error": str(e)})
+
+@app.get("/api/analyze/stream")
+async def analyze_question_stream(question_id: int):
+    """
+    Streaming version of /api/analyze (Server-Sent Events).
+
+    The first event is sent as soon as retrieval is done.
+    """
+    qa = next((q for q in QA_DATA if q["id"] == question_id), None)
+
+    if qa is None:
+        return JSONResponse(
+            status_code=404,
+            content={"success": False, "error": f"Question ID {question_id} not found"}
+        )
+
+    return StreamingResponse(
+        stream_analysis(qa),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/analyze")
 async def analyze_question(request: QuestionRequest):
     """
     Runs both RAG and RAG+NLI pipelines and returns a comparative analysis.
+
+    Responses are cached per question and configuration. Inference is
+    awaited on the inference pool; when its queue is full, the request
+    is rejected with a 503 and a Retry-After header.
     """
     try:
         qa = next(
@@ -109,50 +689,17 @@ async def analyze_question(request: QuestionRequest):
                 "error": f"Question ID {request.question_id} not found"
             }
 
-        question = qa["question"]
-        claim = qa["claim"]
-        good_answer = qa["good_answer"]
-
-        rag_passages, rag_answer = rag_pipeline.answer_for_agent(question)
-        print(rag_answer)
-
-        (
-            subclaims,
-            passages_before_nli,
-            nli_passages,
-            nli_answer
-        ) = rag_nli_pipeline.answer_for_agent(question, claim)
+        if not request.timings:
+            return await get_analysis(qa)
 
-        analysis_text = analyzer.analyze(
-            question=question,
-            claim=claim,
-            rag_passages=rag_passages,
-            rag_answer=rag_answer,
-            subclaims=subclaims,
-            nli_passages=nli_passages,
-            nli_answer=nli_answer,
-            good_answer=good_answer
-        )
+        # Stages run by this request are recorded in the trace; a response
+        # served from the cache or shared with another request has none
+        with trace() as request_trace:
+            response = await get_analysis(qa)
+        return {**response, "timings": request_trace.summary()}
 
-        return {
-            "success": True,
-            "question": question,
-            "claim": claim,
-            "good_answer": good_answer,
-            "rag": {
-                "passages_count": len(rag_passages) if isinstance(rag_passages, list) else 0,
-                "passages": rag_passages if isinstance(rag_passages, list) else [rag_passages],
-                "answer": rag_answer
-            },
-            "rag_nli": {
-                "subclaims": subclaims,
-                "passages_before": len(passages_before_nli) if isinstance(passages_before_nli, list) else 1,
-                "passages_after": len(nli_passages) if isinstance(nli_passages, list) else 0,
-                "passages": nli_passages if isinstance(nli_passages, list) else [nli_passages],
-                "answer": nli_answer
-            },
-            "analysis": analysis_text
-        }
+    except (QueueFullError, ComponentNotReady) as e:
+        return service_unavailable(e)
 
     except Exception as e:
         import traceback
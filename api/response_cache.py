@@ -0,0 +1,56 @@
+import threading
+
+from cachetools import TTLCache
+
+
+class ResponseCache:
+    """
+    LRU cache of full /api/analyze responses with a time-to-live.
+
+    Keys are (question_id, config_signature) tuples, where the signature
+    covers the pipeline configuration and the model versions, so that a
+    config change never serves a stale answer.
+    """
+
+    def __init__(self, max_size=128, ttl=3600):
+        self.entries = TTLCache(maxsize=max_size, ttl=ttl)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+
+    def invalidate(self, question_id=None):
+        """
+        Drop the entries of one question, or all entries if question_id is None.
+        Returns the number of removed entries.
+        """
+        with self.lock:
+            keys = [
+                key for key in list(self.entries.keys())
+                if question_id is None or key[0] == question_id
+            ]
+            for key in keys:
+                self.entries.pop(key, None)
+            return len(keys)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_size": self.entries.maxsize,
+                "ttl": self.entries.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,159 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ComponentNotReady(Exception):
+    """
+    Raised when a component is requested before it finished loading.
+    """
+
+    def __init__(self, name, retry_after=5):
+        super().__init__(f"Component '{name}' is not ready yet")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Component:
+    """
+    One piece of the service (dataset, retriever, model...) and its load status.
+    """
+
+    def __init__(self, name, load, warmup=None, requires=()):
+        self.name = name
+        self.load = load
+        self.warmup = warmup
+        self.requires = tuple(requires)
+
+        self.status = "pending"
+        self.value = None
+        self.error = None
+        self.load_time = None
+        self.warmup_time = None
+
+    def describe(self):
+        return {
+            "status": self.status,
+            "load_time": self.load_time,
+            "warmup_time": self.warmup_time,
+            "error": self.error,
+        }
+
+
+class StartupManager:
+    """
+    Load the service components in the background, concurrently.
+
+    Each component is built by load(*values_of_requires) and then warmed
+    up with one inference if a warmup function is given. Independent
+    components load in parallel; a component starts as soon as the
+    components it requires are ready. The web server can bind its port
+    and answer /healthz while models are still loading.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.ready_at = None
+        self.futures = {}
+
+    def register(self, name, load, warmup=None, requires=()):
+        """
+        Declare a component. Its requirements must be registered first.
+        """
+        for dep in requires:
+            if dep not in self.components:
+                raise ValueError(f"Component '{name}' requires unknown component '{dep}'")
+        self.components[name] = Component(name, load, warmup, requires)
+
+    def start(self):
+        """
+        Start loading every component in background threads.
+
+        Returns a future set to True once every component is ready
+        (False if one of them failed).
+        """
+        self.started_at = time.monotonic()
+        # One thread per component, so waiting on requirements never deadlocks
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.components)),
+            thread_name_prefix="startup"
+        )
+
+        for name in self.components:
+            self.futures[name] = executor.submit(self._load, self.components[name])
+
+        done = Future()
+
+        def wait_all():
+            for future in self.futures.values():
+                future.exception()
+            self.ready_at = time.monotonic()
+            executor.shutdown(wait=False)
+            done.set_result(self.is_ready())
+
+        threading.Thread(target=wait_all, name="startup-wait", daemon=True).start()
+
+        return done
+
+    def _load(self, component):
+        try:
+            # Wait for requirements; a failed requirement fails this component too
+            values = [self.futures[dep].result() for dep in component.requires]
+
+            self._set_status(component, "loading")
+            start = time.monotonic()
+            value = component.load(*values)
+            component.load_time = time.monotonic() - start
+
+            if component.warmup is not None:
+                self._set_status(component, "warming_up")
+                start = time.monotonic()
+                component.warmup(value)
+                component.warmup_time = time.monotonic() - start
+
+            component.value = value
+            self._set_status(component, "ready")
+            print(f"[startup] {component.name} ready in {component.load_time:.1f}s")
+
+            return value
+
+        except Exception as e:
+            component.error = str(e)
+            self._set_status(component, "failed")
+            print(f"[startup] {component.name} failed: {e}")
+            raise
+
+    def _set_status(self, component, status):
+        with self.lock:
+            component.status = status
+
+    def get(self, name):
+        """
+        Return a loaded component, or raise ComponentNotReady.
+        """
+        component = self.components[name]
+        if component.status != "ready":
+            raise ComponentNotReady(name)
+        return component.value
+
+    def is_ready(self):
+        return all(c.status == "ready" for c in self.components.values())
+
+    def status(self):
+        """
+        Per-component status and load times, for /readyz.
+        """
+        with self.lock:
+            return {
+                "ready": all(c.status == "ready" for c in self.components.values()),
+                "uptime": time.monotonic() - self.started_at if self.started_at else 0.0,
+                "startup_time": (
+                    self.ready_at - self.started_at if self.ready_at and self.started_at else None
+                ),
+                "components": {
+                    name: component.describe()
+                    for name, component in self.components.items()
+                },
+            }
@@ -0,0 +1,43 @@
+from benchmarks.common import load_examples, measure, peak_rss_mb
+
+
+def benchmark_generator(config):
+    """
+    Output tokens/sec of Generator.generate_batch for each batch size,
+    on prompts built from the questions and their gold context.
+    """
+    from rag.generator import Generator
+    from rag.ingest import example_chunks
+    from rag.prompt import create_prompt
+    from telemetry.spans import trace
+
+    examples = load_examples(config["data"], config["num_questions"])
+    prompts = [
+        create_prompt(example["question"], list(example_chunks(example))[:config["top_k"]])
+        for example in examples
+    ]
+
+    generator = Generator(model_name=config["models"]["generator"])
+    generator.generate_batch(prompts[:1])  # warm-up
+
+    results = []
+    for batch_size in config["batch_sizes"]:
+        with trace() as run_trace:
+            seconds, _ = measure(
+                lambda: generator.generate_batch(prompts, batch_size), repeat=config["repeat"]
+            )
+        tokens_in = run_trace.counts.get("generator_tokens_in", 0) / config["repeat"]
+        tokens_out = run_trace.counts.get("generator_tokens_out", 0) / config["repeat"]
+
+        results.append({
+            "benchmark": "generator",
+            "batch_size": batch_size,
+            "prompts": len(prompts),
+            "seconds": seconds,
+            "prompts_per_sec": len(prompts) / seconds,
+            "tokens_in_per_sec": tokens_in / seconds,
+            "tokens_out_per_sec": tokens_out / seconds,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+
+    return results
@@ -0,0 +1,54 @@
+from benchmarks.common import load_examples, measure, peak_rss_mb
+
+
+def nli_pairs(examples, claims, num_pairs):
+    """
+    (passage, claim) pairs built from corpus chunks and the evaluation claims.
+    """
+    from rag.ingest import iter_chunks
+
+    chunks = list(iter_chunks(examples))
+    return [
+        (chunks[i % len(chunks)], claims[i % len(claims)])
+        for i in range(num_pairs)
+    ]
+
+
+def benchmark_nli(config):
+    """
+    Pairs/sec of NLIModel forward passes (no cache) for each batch size.
+    """
+    from nli.nli_class import NLIModel
+    from scripts.run_experiments import claims
+    from telemetry.spans import trace
+
+    examples = load_examples(config["data"], max(config["corpus_sizes"]))
+    pairs = nli_pairs(examples, claims, config["num_pairs"])
+
+    nli_model = NLIModel(
+        cache_size=0,
+        backend=config["nli_backend"],
+        model_name=config["models"]["nli"],
+    )
+    nli_model.predict(pairs[:1])  # warm-up
+
+    results = []
+    for batch_size in config["batch_sizes"]:
+        nli_model.batch_size = batch_size
+
+        with trace() as run_trace:
+            seconds, _ = measure(lambda: nli_model.predict(pairs), repeat=config["repeat"])
+        tokens = run_trace.counts.get("nli_tokens_in", 0) / config["repeat"]
+
+        results.append({
+            "benchmark": "nli",
+            "backend": config["nli_backend"],
+            "batch_size": batch_size,
+            "pairs": len(pairs),
+            "seconds": seconds,
+            "pairs_per_sec": len(pairs) / seconds,
+            "tokens_in_per_sec": tokens / seconds,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+
+    return results
@@ -0,0 +1,82 @@
+from benchmarks.common import load_examples, measure, peak_rss_mb
+
+
+def benchmark_pipelines(config):
+    """
+    Questions/sec of each pipeline's answer_many for each corpus size
+    and batch size, with the per-stage time split of the run.
+    """
+    from nli.nli_class import NLIModel
+    from pipelines.rag_baseline import RAGBaseline
+    from pipelines.rag_nli import RAG_NLI
+    from pipelines.rag_nli_subclaim import RAG_NLI_Subclaim
+    from rag.generator import Generator
+    from rag.retriever import BasicRetriever
+    from scripts.run_experiments import claims
+    from telemetry.spans import trace
+
+    # Models are shared by every corpus size; the NLI cache is off so
+    # repeated runs do the same work
+    nli_model = NLIModel(
+        cache_size=0,
+        backend=config["nli_backend"],
+        model_name=config["models"]["nli"],
+    )
+    generator = Generator(model_name=config["models"]["generator"])
+
+    results = []
+    for corpus_size in config["corpus_sizes"]:
+        examples = load_examples(config["data"], corpus_size)
+        num_questions = min(config["num_questions"], len(examples), len(claims))
+        questions = [example["question"] for example in examples[:num_questions]]
+        question_claims = claims[:num_questions]
+
+        retriever = BasicRetriever(
+            examples,
+            model_name=config["models"]["embedding"],
+            index_type=config["index_type"],
+            max_examples=None,
+            progress=False,
+        )
+
+        pipelines = {
+            "rag": RAGBaseline(retriever, generator, top_k=config["top_k"]),
+            "rag_nli": RAG_NLI(retriever, generator, nli_model, top_k=config["top_k"]),
+            "rag_nli_subclaim": RAG_NLI_Subclaim(retriever, generator, nli_model, top_k=config["top_k"]),
+        }
+
+        for name, pipeline in pipelines.items():
+            pipeline.answer_many(questions[:1], question_claims[:1])  # warm-up
+
+            for batch_size in config["batch_sizes"]:
+                generator.batch_size = batch_size
+
+                def run():
+                    return [
+                        pipeline.answer_many(
+                            questions[i:i + batch_size], question_claims[i:i + batch_size]
+                        )
+                        for i in range(0, len(questions), batch_size)
+                    ]
+
+                with trace() as run_trace:
+                    seconds, _ = measure(run, repeat=config["repeat"])
+                summary = run_trace.summary()
+
+                results.append({
+                    "benchmark": "pipeline",
+                    "pipeline": name,
+                    "corpus_examples": len(examples),
+                    "batch_size": batch_size,
+                    "questions": len(questions),
+                    "seconds": seconds,
+                    "questions_per_sec": len(questions) / seconds,
+                    # Mean time per run spent in each stage
+                    "stage_seconds": {
+                        stage: entry["seconds"] / config["repeat"]
+                        for stage, entry in summary["stages"].items()
+                    },
+                    "peak_rss_mb": peak_rss_mb(),
+                })
+
+    return results
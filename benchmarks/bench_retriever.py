@@ -0,0 +1,58 @@
+import time
+
+from benchmarks.common import load_examples, measure, peak_rss_mb, percentile_ms
+
+
+def benchmark_retriever(config):
+    """
+    Index build time, single-query latency and batched queries/sec
+    of BasicRetriever, for each corpus size and batch size.
+    """
+    from rag.retriever import BasicRetriever
+
+    results = []
+
+    for corpus_size in config["corpus_sizes"]:
+        examples = load_examples(config["data"], corpus_size)
+        questions = [example["question"] for example in examples][:config["num_questions"]]
+
+        start = time.perf_counter()
+        retriever = BasicRetriever(
+            examples,
+            model_name=config["models"]["embedding"],
+            index_type=config["index_type"],
+            max_examples=None,
+            progress=False,
+        )
+        build_s = time.perf_counter() - start
+
+        retriever.retriever_chunk("warm-up query")
+
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            retriever.retriever_chunk(question, config["top_k"])
+            latencies.append(time.perf_counter() - start)
+
+        for batch_size in config["batch_sizes"]:
+            seconds, _ = measure(lambda: [
+                retriever.retriever_chunk_batch(questions[i:i + batch_size], config["top_k"])
+                for i in range(0, len(questions), batch_size)
+            ], repeat=config["repeat"])
+
+            results.append({
+                "benchmark": "retriever",
+                "index_type": config["index_type"],
+                "corpus_examples": len(examples),
+                "corpus_chunks": retriever.num_documents(),
+                "batch_size": batch_size,
+                "questions": len(questions),
+                "build_s": build_s,
+                "latency_ms_p50": percentile_ms(latencies, 50),
+                "latency_ms_p95": percentile_ms(latencies, 95),
+                "seconds": seconds,
+                "queries_per_sec": len(questions) / seconds,
+                "peak_rss_mb": peak_rss_mb(),
+            })
+
+    return results
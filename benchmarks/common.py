@@ -0,0 +1,99 @@
+import itertools
+import os
+import pickle
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+
+# Models used by each profile. "tiny" uses randomly initialized stand-ins
+# with the same architectures, for CI-speed runs: their timings are only
+# comparable with each other, not with the "full" profile.
+MODEL_PROFILES = {
+    "full": {
+        "embedding": "all-MiniLM-L6-v2",
+        "nli": "facebook/bart-large-mnli",
+        "generator": "google/flan-t5-small",
+    },
+    "tiny": {
+        "embedding": "sentence-transformers-testing/stsb-bert-tiny-safetensors",
+        "nli": "hf-internal-testing/tiny-random-BartForSequenceClassification",
+        "generator": "hf-internal-testing/tiny-random-t5",
+    },
+}
+
+
+def configure_offline(allow_download=False):
+    """
+    Load models from the local Hugging Face cache only, never from the network.
+    Must run before transformers / sentence_transformers are imported.
+    """
+    if not allow_download:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+        os.environ["HF_DATASETS_OFFLINE"] = "1"
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def load_examples(path, limit=None):
+    """
+    First limit examples of the pickled HotpotQA subset or of a JSONL file.
+    """
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            examples = pickle.load(f)
+        return list(examples[:limit] if limit is not None else examples)
+
+    from rag.ingest import iter_examples
+    return list(itertools.islice(iter_examples(path), limit))
+
+
+def measure(fn, repeat=1):
+    """
+    Best wall time of fn over repeat runs, and its last result.
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def percentile_ms(latencies, q):
+    ordered = sorted(latencies)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return 1000 * ordered[index]
+
+
+def environment():
+    """
+    Run metadata stored next to the results, to compare runs.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,60 @@
+# benchmarks/compare.py
+#
+# Compare two result files of benchmarks.run: throughput ratio (new / old)
+# and peak RSS of every configuration present in both.
+#
+# Usage:
+#   python -m benchmarks.compare baseline.json candidate.json
+
+import argparse
+import json
+
+
+# Fields identifying a configuration, the others are measurements
+KEY_FIELDS = (
+    "benchmark", "pipeline", "backend", "index_type",
+    "corpus_examples", "batch_size",
+)
+
+
+def result_key(row):
+    return tuple((field, row[field]) for field in KEY_FIELDS if field in row)
+
+
+# Throughput compared for each benchmark
+THROUGHPUT_FIELDS = {
+    "retriever": "queries_per_sec",
+    "nli": "pairs_per_sec",
+    "generator": "tokens_out_per_sec",
+    "pipeline": "questions_per_sec",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {result_key(row): row for row in json.load(f)["results"]}
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)["results"]
+
+    print(f"{'configuration':<60}{'metric':>20}{'old':>10}{'new':>10}{'ratio':>8}{'RSS MB':>14}")
+    for row in candidate:
+        key = result_key(row)
+        old = baseline.get(key)
+        if old is None:
+            continue
+
+        field = THROUGHPUT_FIELDS[row["benchmark"]]
+        name = " ".join(f"{k}={v}" for k, v in key)
+        print(
+            f"{name:<60}{field:>20}{old[field]:>10.1f}{row[field]:>10.1f}"
+            f"{row[field] / old[field]:>8.2f}{old['peak_rss_mb']:>7.0f}{row['peak_rss_mb']:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/run.py
+#
+# Offline throughput / latency benchmarks of the retriever, the NLI model,
+# the generator and the end-to-end pipelines. Models are loaded from the
+# local Hugging Face cache only; results are written as JSON.
+#
+# Usage:
+#   python -m benchmarks.run --profile tiny --output benchmarks/results/tiny.json
+#   python -m benchmarks.run --only nli generator --batch-sizes 1 8 32
+#   python -m benchmarks.compare old.json new.json
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from benchmarks.common import MODEL_PROFILES, configure_offline, environment
+
+
+BENCHMARKS = {
+    "retriever": ("benchmarks.bench_retriever", "benchmark_retriever"),
+    "nli": ("benchmarks.bench_nli", "benchmark_nli"),
+    "generator": ("benchmarks.bench_generator", "benchmark_generator"),
+    "pipelines": ("benchmarks.bench_pipelines", "benchmark_pipelines"),
+}
+
+
+def run_benchmark(name, config):
+    """
+    Run one benchmark (in a fresh process, see main).
+    """
+    import importlib
+    import torch
+
+    if config["threads"]:
+        torch.set_num_threads(config["threads"])
+
+    module_name, function_name = BENCHMARKS[name]
+    function = getattr(importlib.import_module(module_name), function_name)
+    return function(config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite.")
+    parser.add_argument("--profile", default="tiny", choices=sorted(MODEL_PROFILES))
+    parser.add_argument("--only", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--data", default="data/hotpotqa_300.pkl", help="Pickled HotpotQA subset or JSONL corpus")
+    parser.add_argument("--corpus-sizes", nargs="+", type=int, default=[50, 300], help="Corpus sizes, in examples")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--num-questions", type=int, default=32)
+    parser.add_argument("--num-pairs", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--index-type", default="flat_l2")
+    parser.add_argument("--nli-backend", default="torch", choices=["torch", "quantized", "onnx"])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measure, the best one is kept")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--allow-download", action="store_true", help="Fetch models missing from the local cache")
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    # Inherited by the benchmark processes
+    configure_offline(args.allow_download)
+
+    config = {
+        "profile": args.profile,
+        "models": MODEL_PROFILES[args.profile],
+        "data": args.data,
+        "corpus_sizes": args.corpus_sizes,
+        "batch_sizes": args.batch_sizes,
+        "num_questions": args.num_questions,
+        "num_pairs": args.num_pairs,
+        "top_k": args.top_k,
+        "index_type": args.index_type,
+        "nli_backend": args.nli_backend,
+        "repeat": args.repeat,
+        "threads": args.threads,
+    }
+
+    results = []
+    for name in args.only:
+        print(f"Running {name} benchmark...")
+        # One process per benchmark, so peak RSS covers that benchmark only
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            rows = executor.submit(run_benchmark, name, config).result()
+
+        for row in rows:
+            print(json.dumps(row))
+        results.extend(rows)
+
+    report = {"environment": environment(), "config": config, "results": results}
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
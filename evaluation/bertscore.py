@@ -0,0 +1,224 @@
+import os
+import threading
+from collections import OrderedDict, defaultdict
+
+import bert_score
+import pandas as pd
+import torch
+from bert_score.utils import get_bert_embedding, get_model, get_tokenizer, greedy_cos_idf, model2layers
+from torch.nn.utils.rnn import pad_sequence
+
+
+class BertScorer:
+    """
+    BERTScore with the model and the baseline loaded once per process.
+
+    Sentence embeddings are cached (LRU of cache_size sentences), so gold
+    answers are encoded once for all pipelines, and so are answers that
+    several pipelines produce. Sentences are encoded longest first in
+    batches of batch_size, then pairs are matched batch_size at a time,
+    as bert_score.score does (idf weighting off).
+    """
+
+    def __init__(
+        self,
+        model_type="distilbert-base-uncased",
+        lang="en",
+        rescale_with_baseline=True,
+        batch_size=64,
+        cache_size=50_000,
+        device=None
+    ):
+        self.model_type = model_type
+        self.lang = lang
+        self.rescale_with_baseline = rescale_with_baseline
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        self.num_layers = model2layers[model_type]
+        self.tokenizer = get_tokenizer(model_type, use_fast=False)
+        self.model = get_model(model_type, self.num_layers, all_layers=False)
+        self.model.to(self.device)
+
+        # Without idf every token weighs 1, except [SEP] and [CLS]
+        self.idf_dict = defaultdict(lambda: 1.0)
+        self.idf_dict[self.tokenizer.sep_token_id] = 0
+        self.idf_dict[self.tokenizer.cls_token_id] = 0
+
+        self.baseline_vals = None
+        if rescale_with_baseline:
+            baseline_path = os.path.join(
+                os.path.dirname(bert_score.__file__), "rescale_baseline", lang, f"{model_type}.tsv"
+            )
+            self.baseline_vals = torch.from_numpy(
+                pd.read_csv(baseline_path).iloc[self.num_layers].to_numpy()
+            )[1:].float()
+
+        # sentence -> (token embeddings, token idf weights)
+        self.embeddings = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self):
+        return f"{self.model_type}|layers={self.num_layers}|rescale={self.rescale_with_baseline}|{self.lang}"
+
+    def embed(self, sentences):
+        """
+        Embeddings of sentences, encoding only those not cached yet.
+        Returns {sentence: (embedding, idf)}.
+        """
+        stats = {}
+        with self.lock:
+            for sentence in dict.fromkeys(sentences):
+                cached = self.embeddings.get(sentence)
+                if cached is not None:
+                    self.embeddings.move_to_end(sentence)
+                    stats[sentence] = cached
+            self.hits += len(stats)
+
+        missing = [sentence for sentence in dict.fromkeys(sentences) if sentence not in stats]
+        missing.sort(key=lambda sentence: len(sentence.split(" ")), reverse=True)
+
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            embs, masks, padded_idf = get_bert_embedding(
+                batch, self.model, self.tokenizer, self.idf_dict, device=self.device
+            )
+            embs, masks, padded_idf = embs.cpu(), masks.cpu(), padded_idf.cpu()
+
+            with self.lock:
+                for i, sentence in enumerate(batch):
+                    length = int(masks[i].sum())
+                    stats[sentence] = (embs[i, :length], padded_idf[i, :length])
+                    self.embeddings[sentence] = stats[sentence]
+                while len(self.embeddings) > self.cache_size:
+                    self.embeddings.popitem(last=False)
+                self.misses += len(batch)
+
+        return stats
+
+    def _pad(self, stats):
+        embs = [emb.to(self.device) for emb, _ in stats]
+        idfs = [idf.to(self.device) for _, idf in stats]
+        lengths = torch.tensor([emb.size(0) for emb in embs], dtype=torch.long)
+        mask = torch.arange(int(lengths.max())).expand(len(embs), -1) < lengths.unsqueeze(1)
+
+        return (
+            pad_sequence(embs, batch_first=True, padding_value=2.0),
+            mask.to(self.device),
+            pad_sequence(idfs, batch_first=True),
+        )
+
+    def score_pairs(self, cands, refs):
+        """
+        Per-pair (P, R, F1), as a tensor of shape (len(cands), 3).
+        """
+        cands, refs = list(cands), list(refs)
+        if not cands:
+            return torch.zeros((0, 3))
+
+        stats = self.embed(refs + cands)
+
+        preds = []
+        with torch.no_grad():
+            for start in range(0, len(refs), self.batch_size):
+                ref_stats = self._pad([stats[s] for s in refs[start:start + self.batch_size]])
+                hyp_stats = self._pad([stats[s] for s in cands[start:start + self.batch_size]])
+                P, R, F1 = greedy_cos_idf(*ref_stats, *hyp_stats)
+                preds.append(torch.stack((P, R, F1), dim=-1).cpu())
+        preds = torch.cat(preds, dim=0)
+
+        if self.baseline_vals is not None:
+            preds = (preds - self.baseline_vals) / (1 - self.baseline_vals)
+
+        return preds
+
+    def score(self, cands, refs):
+        """
+        Mean P, R and F1 over all pairs (same output as compute_bertscore_batch).
+        """
+        return mean_scores(self.score_pairs(cands, refs))
+
+    def stream(self, refs):
+        """
+        Accumulator scoring predictions against refs as they are produced.
+        """
+        return IncrementalBertScore(self, refs)
+
+    def stats(self):
+        with self.lock:
+            return {"cached_sentences": len(self.embeddings), "hits": self.hits, "misses": self.misses}
+
+
+def mean_scores(preds):
+    """
+    Mean of each column of a (N, 3) tensor of per-pair scores (NaN if N = 0).
+    """
+    if len(preds) == 0:
+        return (float("nan"),) * 3
+    return tuple(preds[:, i].mean().item() for i in range(3))
+
+
+class IncrementalBertScore:
+    """
+    Scores predictions against refs (in order) as they stream in.
+
+    Pairs are scored batch_size at a time as soon as a batch is full,
+    so only the last partial batch is left when the evaluation ends.
+    Batches start at multiples of batch_size however the predictions
+    arrive, so the scores do not depend on how they were produced.
+    """
+
+    def __init__(self, scorer, refs):
+        self.scorer = scorer
+        self.refs = list(refs)
+        self.pending = []
+        self.scored = 0
+        self.parts = []
+
+    def add(self, cands):
+        """
+        Queue the next predictions, scoring every full batch.
+        """
+        self.pending += cands
+        while len(self.pending) >= self.scorer.batch_size:
+            self._score(self.scorer.batch_size)
+
+    def _score(self, n):
+        refs = self.refs[self.scored:self.scored + n]
+        self.parts.append(self.scorer.score_pairs(self.pending[:n], refs))
+        del self.pending[:n]
+        self.scored += n
+
+    def scores(self):
+        """
+        Per-pair (P, R, F1) of every prediction added, shape (N, 3).
+        """
+        if self.pending:
+            self._score(len(self.pending))
+        if not self.parts:
+            return torch.zeros((0, 3))
+        return torch.cat(self.parts, dim=0)
+
+    def result(self):
+        """
+        Mean P, R and F1 over every prediction added (NaN if none was).
+        """
+        return mean_scores(self.scores())
+
+
+_default_scorer = None
+_default_lock = threading.Lock()
+
+
+def get_scorer():
+    """
+    Process-wide scorer with the evaluation settings, loaded on first use.
+    """
+    global _default_scorer
+    with _default_lock:
+        if _default_scorer is None:
+            _default_scorer = BertScorer()
+        return _default_scorer
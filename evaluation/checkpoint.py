@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import time
+
+from evaluation.bertscore import get_scorer
+from evaluation.evaluate import aggregate_scores, evaluation_size, lexical_scores
+
+
+def config_hash(pipeline):
+    """
+    Short hash of pipeline.config(): logged results are reused only
+    for a pipeline whose configuration did not change.
+    """
+    config = json.dumps(pipeline.config(), sort_keys=True)
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
+
+
+class ResultLog:
+    """
+    Append-only JSONL log of per-example evaluation records.
+
+    Each record is written and flushed as soon as it is computed,
+    so an interrupted run loses at most the batch in progress.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.repair()
+
+    def repair(self):
+        """
+        Drop a partially written last line left by a crash,
+        so that new records do not get appended to it.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+
+    def read(self):
+        """
+        All records of the log, unreadable lines are skipped.
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable line in {self.path}")
+        return records
+
+    def records_for(self, pipeline_name, pipeline_hash):
+        """
+        Latest record of each question for one pipeline configuration.
+        """
+        return {
+            record["question_id"]: record
+            for record in self.read()
+            if record["pipeline"] == pipeline_name and record["config_hash"] == pipeline_hash
+        }
+
+    def append(self, records):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def question_id(dataset, n):
+    """
+    Stable id of an example: the dataset id when there is one, else its position.
+    """
+    return str(dataset[n].get("id", n))
+
+
+def aggregate_records(records):
+    """
+    Dataset-level metrics recomputed from logged records (in dataset order).
+
+    BERTScore is averaged from the logged per-example scores when they all
+    come from the same scorer, and recomputed otherwise (e.g. older logs).
+    """
+    answers = [record["answer"] for record in records]
+    golds = [record["gold"] for record in records]
+
+    bert_score = None
+    if len({record.get("bert_scorer") for record in records} - {None}) == 1 \
+            and all("bert_score" in record for record in records):
+        columns = zip(*(record["bert_score"] for record in records))
+        bert_score = tuple(sum(column) / len(records) for column in columns)
+
+    results = aggregate_scores(
+        [record["em"] for record in records],
+        [record["f1"] for record in records],
+        answers,
+        golds,
+        bert_score
+    )
+    results["size"] = len(records)
+    results["total_time"] = sum(sum(record["stage_times"].values()) for record in records)
+    return results
+
+
+def evaluate_pipeline_checkpointed(
+    pipeline, name, dataset, log, claims=[], size=100, batch_size=1
+):
+    """
+    Evaluate a pipeline on the first `size` examples, reusing the examples
+    already in the log for the same pipeline configuration (and claim).
+
+    Missing examples are computed batch_size at a time, stage by stage,
+    and appended to the log with the retrieved and kept chunk ids, the
+    answer, EM, F1, BERTScore and stage timings (the batch time split
+    evenly over its examples). BERTScore is thus computed batch by batch
+    as answers come in. Aggregates are then recomputed from the log records.
+    """
+    size = evaluation_size(dataset, claims, size, len(claims) != 0)
+
+    pipeline_hash = config_hash(pipeline)
+    done = log.records_for(name, pipeline_hash)
+
+    def claim_of(n):
+        return claims[n] if len(claims) != 0 else None
+
+    todo = [
+        n for n in range(size)
+        if question_id(dataset, n) not in done
+        or done[question_id(dataset, n)]["claim"] != claim_of(n)
+    ]
+    print(f"{name}: {size - len(todo)} examples reused from {log.path}, {len(todo)} to compute")
+
+    if todo:
+        scorer = get_scorer()
+        scorer.embed([dataset[n]["answer"] for n in todo])
+
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        questions = [dataset[n]["question"] for n in batch]
+        golds = [dataset[n]["answer"] for n in batch]
+
+        t = time.perf_counter()
+        passages_list, _, ids_list = pipeline.retriever.retriever_chunk_batch(questions, pipeline.top_k)
+        retrieval_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if len(claims) != 0:
+            filtered_list = pipeline.filter_many(passages_list, [claims[n] for n in batch])
+        else:
+            filtered_list = passages_list
+        nli_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        answers = pipeline.generate_many(questions, filtered_list)
+        generation_time = time.perf_counter() - t
+
+        em_scores, f1_scores = lexical_scores(answers, golds)
+        bert_scores = scorer.score_pairs(answers, golds).tolist()
+
+        records = []
+        for i, n in enumerate(batch):
+            # Kept passages are a subset of the retrieved ones
+            id_of = dict(zip(passages_list[i], ids_list[i]))
+            records.append({
+                "question_id": question_id(dataset, n),
+                "index": n,
+                "pipeline": name,
+                "config_hash": pipeline_hash,
+                "claim": claim_of(n),
+                "retrieved_ids": ids_list[i],
+                "filtered_ids": [id_of[passage] for passage in filtered_list[i]],
+                "answer": answers[i],
+                "gold": golds[i],
+                "em": em_scores[i],
+                "f1": f1_scores[i],
+                "bert_score": bert_scores[i],
+                "bert_scorer": scorer.signature(),
+                "stage_times": {
+                    "retrieval": retrieval_time / len(batch),
+                    "nli": nli_time / len(batch),
+                    "generation": generation_time / len(batch),
+                },
+                "batch_size": len(batch),
+            })
+            done[records[-1]["question_id"]] = records[-1]
+
+        log.append(records)
+
+    results = aggregate_records([done[question_id(dataset, n)] for n in range(size)])
+    results["config_hash"] = pipeline_hash
+    results["computed"] = len(todo)
+    return results
+
+
+def run_checkpointed_experiment(
+    dataset, claims, rag, rag_nli, rag_subclaim, log_path, size=100, batch_size=1
+):
+    """
+    Same comparison as run_experiment, resumable from the per-example log at log_path.
+    As there, the NLI pipelines run on at most len(claims) questions.
+    """
+    log = ResultLog(log_path)
+
+    return {
+        "RAG": evaluate_pipeline_checkpointed(rag, "RAG", dataset, log, size=size, batch_size=batch_size),
+        "RAG_NLI": evaluate_pipeline_checkpointed(
+            rag_nli, "RAG_NLI", dataset, log, claims, size, batch_size
+        ),
+        "RAG_NLI_SUBCLAIM": evaluate_pipeline_checkpointed(
+            rag_subclaim, "RAG_NLI_SUBCLAIM", dataset, log, claims, size, batch_size
+        ),
+    }
+
+
+def summarize_log(log_path):
+    """
+    Aggregates of every (pipeline, config hash) in a log. No model is
+    loaded unless some records lack their per-example BERTScore.
+    """
+    groups = {}
+    for record in ResultLog(log_path).read():
+        key = (record["pipeline"], record["config_hash"])
+        groups.setdefault(key, {})[record["question_id"]] = record
+
+    return {
+        f"{pipeline}@{pipeline_hash}": aggregate_records(
+            sorted(records.values(), key=lambda record: record["index"])
+        )
+        for (pipeline, pipeline_hash), records in groups.items()
+    }
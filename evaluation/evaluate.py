@@ -1,78 +1,274 @@
-from evaluation.metrics import exact_match, f1_score, compute_bertscore_batch
+import time
 
+from evaluation.bertscore import get_scorer
+from evaluation.metrics import exact_match, f1_score, cache_gold_embeddings
 
-def evaluate_pipeline(pipeline, dataset, claims=[]):
+
+def lexical_scores(all_answers, all_gold_answers):
     """
-    Evaluate a QA pipeline on a fixed-size subset of the dataset using
-    Exact Match, F1, and BERTScore.
+    Per-example Exact Match and F1.
+    """
+    em_scores = [exact_match(a, g) for a, g in zip(all_answers, all_gold_answers)]
+    f1_scores = [f1_score(a, g) for a, g in zip(all_answers, all_gold_answers)]
+    return em_scores, f1_scores
 
-    If claims are provided, the pipeline is assumed to require a claim
-    as additional input (e.g. NLI-based pipelines).
+
+def score_answers(all_answers, all_gold_answers):
+    """
+    Compute Exact Match, F1 and BERTScore over a list of predictions.
     """
-    em = 0
-    f1 = 0
-    size = 100  # Fixed evaluation size for fair comparison across pipelines
+    em_scores, f1_scores = lexical_scores(all_answers, all_gold_answers)
+    return aggregate_scores(em_scores, f1_scores, all_answers, all_gold_answers)
 
-    all_answers = []
-    all_gold_answers = []
 
-    # Case where the pipeline expects both question and claim
-    if len(claims) != 0:
-        for n in range(size):
-            answer = pipeline.answer(
-                dataset[n]["question"],
-                claims[n]
-            )
-            gold_answer = dataset[n]["answer"]
+def aggregate_scores(em_scores, f1_scores, all_answers, all_gold_answers, bert_score=None):
+    """
+    Dataset-level metrics from per-example EM/F1 (in dataset order)
+    and BERTScore over all predictions, unless its mean (P, R, F1)
+    bert_score was already computed as the answers came in.
+    """
+    size = len(all_answers)
+    em = sum(em_scores)
+    f1 = sum(f1_scores)
+
+    if bert_score is None:
+        # Compute semantic similarity metrics over all predictions,
+        # in the same batches as when scoring while answering
+        bert_stream = get_scorer().stream(all_gold_answers)
+        bert_stream.add(all_answers)
+        bert_score = bert_stream.result()
+    bert_p, bert_r, bert_f1 = bert_score
+
+    # Normalize scores by dataset size
+    return {
+        "exact_match": em / size,
+        "f1": f1 / size,
+        "bert_score_precision": bert_p,
+        "bert_score_recall": bert_r,
+        "bert_score_f1": bert_f1,
+    }
 
-            em += exact_match(answer, gold_answer)
-            f1 += f1_score(answer, gold_answer)
 
-            all_answers.append(answer)
-            all_gold_answers.append(gold_answer)
+def evaluation_size(dataset, claims, size, uses_claims=False):
+    """
+    Number of examples a pipeline is evaluated on: size, limited by the
+    dataset and, for pipelines that need a claim, by the claims.
+    """
+    size = min(size, len(dataset))
+    if uses_claims:
+        size = min(size, len(claims))
+    return size
+
+
+def answer_questions(pipeline, questions, claims=[], batched=False, on_answers=None):
+    """
+    Answers of a pipeline to questions (with their claims, if any),
+    and the wall time of each stage in batched mode.
+
+    on_answers, if given, is called with every new list of answers,
+    in order (each answer as it comes, all at once in batched mode).
+    """
+    def emit(answers):
+        if on_answers is not None:
+            on_answers(answers)
+        return answers
+
+    stage_times = {}
+
+    if batched:
+        stage_claims = list(claims) if len(claims) != 0 else None
+
+        t = time.perf_counter()
+        passages_list = pipeline.retrieve_many(questions)
+        stage_times["retrieval"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if stage_claims is not None:
+            passages_list = pipeline.filter_many(passages_list, stage_claims)
+        stage_times["nli"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        all_answers = pipeline.generate_many(questions, passages_list)
+        stage_times["generation"] = time.perf_counter() - t
+        emit(all_answers)
+
+    # Case where the pipeline expects both question and claim
+    elif len(claims) != 0:
+        all_answers = [
+            emit([pipeline.answer(question, claim)])[0]
+            for question, claim in zip(questions, claims)
+        ]
 
     # Case where the pipeline only needs the question
     else:
-        for n in range(size):
-            answer = pipeline.answer(dataset[n]["question"])
-            gold_answer = dataset[n]["answer"]
+        all_answers = [emit([pipeline.answer(question)])[0] for question in questions]
+
+    return all_answers, stage_times
+
+
+def evaluate_pipeline(pipeline, dataset, claims=[], size=100, batched=False):
+    """
+    Evaluate a QA pipeline on the first `size` examples of the dataset using
+    Exact Match, F1, and BERTScore.
+
+    If claims are provided, the pipeline is assumed to require a claim
+    as additional input (e.g. NLI-based pipelines).
+
+    With batched=True, each stage runs once for the whole evaluation set
+    (retrieval for all questions, then NLI for all pairs, then generation
+    for all prompts) and the wall time of every stage is reported.
+
+    BERTScore is computed batch by batch while the answers come in
+    (see evaluation.bertscore.IncrementalBertScore); its time is reported
+    separately and left out of total_time.
+    """
+    size = evaluation_size(dataset, claims, size, len(claims) != 0)
+
+    questions = [dataset[n]["question"] for n in range(size)]
+    all_gold_answers = [dataset[n]["answer"] for n in range(size)]
+
+    # No-op when another pipeline was already evaluated on these questions
+    cache_gold_embeddings(all_gold_answers)
 
-            em += exact_match(answer, gold_answer)
-            f1 += f1_score(answer, gold_answer)
+    bert_stream = get_scorer().stream(all_gold_answers)
+    bertscore_time = 0.0
 
-            all_answers.append(answer)
-            all_gold_answers.append(gold_answer)
+    def score_while_answering(answers):
+        nonlocal bertscore_time
+        t = time.perf_counter()
+        bert_stream.add(answers)
+        bertscore_time += time.perf_counter() - t
 
-    # Compute semantic similarity metrics over all predictions
-    bert_p, bert_r, bert_f1 = compute_bertscore_batch(
-        all_answers,
-        all_gold_answers
+    start = time.perf_counter()
+    all_answers, stage_times = answer_questions(
+        pipeline, questions, claims[:size], batched, on_answers=score_while_answering
     )
+    total_time = time.perf_counter() - start - bertscore_time
 
-    # Normalize scores by dataset size
-    em /= size
-    f1 /= size
+    t = time.perf_counter()
+    bert_score = bert_stream.result()
+    bertscore_time += time.perf_counter() - t
 
-    return {
-        "exact_match": em,
-        "f1": f1,
-        "bert_score_precision": bert_p,
-        "bert_score_recall": bert_r,
-        "bert_score_f1": bert_f1,
+    em_scores, f1_scores = lexical_scores(all_answers, all_gold_answers)
+    results = aggregate_scores(em_scores, f1_scores, all_answers, all_gold_answers, bert_score)
+    results["size"] = size
+    results["total_time"] = total_time
+    results["bertscore_time"] = bertscore_time
+    results["questions_per_sec"] = size / total_time if total_time > 0 else 0.0
+    if batched:
+        results["stage_times"] = stage_times
+        results["stage_questions_per_sec"] = {
+            stage: size / t if t > 0 else 0.0
+            for stage, t in stage_times.items()
+        }
+
+    return results
+
+
+def run_shared_experiment(dataset, claims, pipelines, size=100):
+    """
+    Compare several pipelines on the same questions while sharing stages.
+
+    pipelines maps a result name to a pipeline. Retrieval runs once per
+    distinct (retriever, top_k) and its passages are fanned out to every
+    pipeline using it. Prompts are deduplicated per generator before
+    generation, so a prompt produced by several pipelines (e.g. when NLI
+    falls back to the original passages) is generated only once.
+    Compute therefore scales with what actually differs between variants.
+
+    Pipelines using claims are evaluated on the questions that have one,
+    the others on up to size questions (see evaluation_size).
+    """
+    sizes = {
+        name: evaluation_size(dataset, claims, size, pipeline.uses_claims)
+        for name, pipeline in pipelines.items()
+    }
+    size = max(sizes.values())
+    questions = [dataset[n]["question"] for n in range(size)]
+    all_gold_answers = [dataset[n]["answer"] for n in range(size)]
+    stage_claims = list(claims[:size])
+    stage_times = {"retrieval": 0.0, "nli": 0.0, "generation": 0.0}
+
+    cache_gold_embeddings(all_gold_answers)
+
+    # Retrieval, once per distinct retriever configuration
+    retrieved = {}
+    passages_by_name = {}
+    for name, pipeline in pipelines.items():
+        key = (id(pipeline.retriever), pipeline.top_k)
+        if key not in retrieved:
+            t = time.perf_counter()
+            retrieved[key] = pipeline.retrieve_many(questions)
+            stage_times["retrieval"] += time.perf_counter() - t
+        passages_by_name[name] = retrieved[key][:sizes[name]]
+
+    # Filtering, specific to each pipeline
+    prompts_by_name = {}
+    for name, pipeline in pipelines.items():
+        n = sizes[name]
+        t = time.perf_counter()
+        filtered = pipeline.filter_many(passages_by_name[name], stage_claims[:n])
+        stage_times["nli"] += time.perf_counter() - t
+        prompts_by_name[name] = pipeline.build_prompts(questions[:n], filtered)
+
+    # Generation, once per distinct prompt and generator
+    unique_prompts = {}
+    for name, pipeline in pipelines.items():
+        prompts = unique_prompts.setdefault(id(pipeline.generator), {})
+        prompts.update(dict.fromkeys(prompts_by_name[name]))
+
+    generated = {}
+    for name, pipeline in pipelines.items():
+        key = id(pipeline.generator)
+        if key not in generated:
+            prompts = list(unique_prompts[key])
+            t = time.perf_counter()
+            generated[key] = dict(zip(prompts, pipeline.generator.generate_answers(prompts)))
+            stage_times["generation"] += time.perf_counter() - t
+
+    results = {}
+    for name, pipeline in pipelines.items():
+        answers_by_prompt = generated[id(pipeline.generator)]
+        all_answers = [answers_by_prompt[prompt] for prompt in prompts_by_name[name]]
+        results[name] = score_answers(all_answers, all_gold_answers[:sizes[name]])
+        results[name]["size"] = sizes[name]
+
+    results["SHARED_STAGES"] = {
+        "retrieval_runs": len(retrieved),
+        "prompts_total": sum(len(p) for p in prompts_by_name.values()),
+        "prompts_generated": sum(len(p) for p in unique_prompts.values()),
+        "stage_times": stage_times,
     }
 
+    return results
 
-def run_experiment(dataset, claims, rag, rag_nli, rag_subclaim):
+
+def run_experiment(dataset, claims, rag, rag_nli, rag_subclaim, size=100, batched=False, shared=False):
     """
     Run a comparative evaluation of multiple QA pipelines on the same dataset.
+
+    With shared=True, retrieval and identical prompts are computed once
+    for all pipelines (see run_shared_experiment).
+
+    The NLI pipelines need a claim per question, so they run on at most
+    len(claims) questions, the baseline on up to size. The "size" of
+    each result is the number of examples actually evaluated.
     """
+    if shared:
+        return run_shared_experiment(
+            dataset,
+            claims,
+            {"RAG": rag, "RAG_NLI": rag_nli, "RAG_NLI_SUBCLAIM": rag_subclaim},
+            size
+        )
+
     results = {}
 
-    # Baseline RAG does not require claims
-    results["RAG"] = evaluate_pipeline(rag, dataset)
+    # Baseline RAG does not require claims, it can run on more questions
+    results["RAG"] = evaluate_pipeline(rag, dataset, size=size, batched=batched)
 
     # NLI-based pipelines require claims as additional input
-    results["RAG_NLI"] = evaluate_pipeline(rag_nli, dataset, claims)
-    results["RAG_NLI_SUBCLAIM"] = evaluate_pipeline(rag_subclaim, dataset, claims)
+    results["RAG_NLI"] = evaluate_pipeline(rag_nli, dataset, claims, size, batched)
+    results["RAG_NLI_SUBCLAIM"] = evaluate_pipeline(rag_subclaim, dataset, claims, size, batched)
 
     return results
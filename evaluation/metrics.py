@@ -1,4 +1,4 @@
-from bert_score import score
+from evaluation.bertscore import get_scorer
 import re
 from collections import Counter
 
@@ -25,9 +25,17 @@ def f1_score(prediction, gold_answer):
     return  2* ((recall * precision) / (precision + recall))
 
 
-def compute_bertscore_batch(preds, golds):
-    model_type = "distilbert-base-uncased"
-    rescale_with_baseline = True
-    P, R, F1 = score(preds, golds, model_type=model_type,
-                     rescale_with_baseline=rescale_with_baseline, lang="en")
-    return P.mean().item(), R.mean().item(), F1.mean().item()
\ No newline at end of file
+def compute_bertscore_batch(preds, golds, scorer=None):
+    """
+    Mean BERTScore P, R and F1 (distilbert-base-uncased, rescaled with baseline).
+    The model is loaded once per process and embeddings are cached, see evaluation.bertscore.
+    """
+    scorer = scorer or get_scorer()
+    return scorer.score(preds, golds)
+
+
+def cache_gold_embeddings(golds):
+    """
+    Encode the gold answers ahead of scoring, once for all the pipelines evaluated on them.
+    """
+    get_scorer().embed(golds)
@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+import time
+
+import torch
+
+from evaluation.evaluate import aggregate_scores, answer_questions, evaluation_size, lexical_scores
+from evaluation.metrics import cache_gold_embeddings
+
+
+# Set in the parent right before forking the workers, which inherit it:
+# models, FAISS index and dataset are shared copy-on-write, never pickled.
+_shared = None
+
+
+def shard_ranges(size, num_shards):
+    """
+    Split range(size) into num_shards contiguous (start, stop) ranges
+    whose lengths differ by at most one.
+    """
+    num_shards = max(1, min(num_shards, size))
+    base, extra = divmod(size, num_shards)
+    ranges, start = [], 0
+    for shard in range(num_shards):
+        stop = start + base + (1 if shard < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _init_worker(threads):
+    # Split the cores between workers instead of oversubscribing them
+    torch.set_num_threads(threads)
+
+    # SQLite connections must not cross a fork
+    for pipeline, _ in _shared["pipelines"].values():
+        nli_model = getattr(pipeline, "nli_model", None)
+        if nli_model is not None:
+            nli_model.cache.reopen()
+
+
+def _nli_models(pipelines):
+    """
+    Distinct NLI models used by the pipelines.
+    """
+    models = {}
+    for pipeline, _ in pipelines.values():
+        nli_model = getattr(pipeline, "nli_model", None)
+        if nli_model is not None:
+            models[id(nli_model)] = nli_model
+    return list(models.values())
+
+
+def nli_counters(pipelines):
+    """
+    NLI cache, sub-claim filter and cascade counters, summed over the
+    NLI models of the pipelines.
+    """
+    counters = {}
+    for nli_model in _nli_models(pipelines):
+        stats = {
+            "cache": {
+                "hits": nli_model.cache.hits,
+                "disk_hits": nli_model.cache.disk_hits,
+                "misses": nli_model.cache.misses,
+            },
+            "filter": dict(nli_model.filter_stats),
+        }
+        if nli_model.cascade is not None:
+            cascade = nli_model.cascade
+            stats["cascade"] = {
+                "pairs": cascade.pairs,
+                "resolved_positive": cascade.resolved_positive,
+                "resolved_negative": cascade.resolved_negative,
+                "escalated_to_large_model": cascade.escalated,
+            }
+        add_counters(counters, stats)
+    return counters
+
+
+def add_counters(total, counters, sign=1):
+    """
+    Add nested counters into total (subtract them with sign=-1).
+    """
+    for group, values in counters.items():
+        group_total = total.setdefault(group, {})
+        for name, value in values.items():
+            group_total[name] = group_total.get(name, 0) + sign * value
+    return total
+
+
+def _run_shard(shard):
+    """
+    Answer the questions of one shard with every pipeline,
+    and score them with EM/F1. Pipelines using claims only answer the
+    questions that have one. The NLI counters of the shard are
+    returned too, as the parent's NLI models are not used.
+    """
+    # A worker may run several shards: only count this one
+    counters_before = nli_counters(_shared["pipelines"])
+
+    start, stop = shard
+    questions = _shared["questions"][start:stop]
+    golds = _shared["golds"][start:stop]
+    claims = _shared["claims"][start:stop]
+    batched = _shared["batched"]
+
+    results = {}
+    for name, (pipeline, uses_claims) in _shared["pipelines"].items():
+        n = len(claims) if uses_claims else len(questions)
+        t = time.perf_counter()
+        answers, stage_times = answer_questions(
+            pipeline, questions[:n], claims if uses_claims else [], batched
+        )
+        elapsed = time.perf_counter() - t
+
+        em_scores, f1_scores = lexical_scores(answers, golds[:n])
+        results[name] = {
+            "answers": answers,
+            "em_scores": em_scores,
+            "f1_scores": f1_scores,
+            "time": elapsed,
+            "stage_times": stage_times,
+        }
+
+    results["nli"] = add_counters(nli_counters(_shared["pipelines"]), counters_before, sign=-1)
+    return shard, results
+
+
+def run_sharded_experiment(dataset, claims, pipelines, size=100, num_shards=None, batched=False):
+    """
+    Evaluate several pipelines with the questions split across worker processes.
+
+    pipelines maps a result name to (pipeline, uses_claims). Workers are
+    forked after the models are loaded, so they share the weights and
+    the index copy-on-write. Each worker answers a contiguous shard of
+    questions with every pipeline and returns its answers and per-example
+    EM/F1. The shards are merged in dataset order and BERTScore is computed
+    in the same batches as in the serial run, so the metrics equal those of
+    the serial run in the same mode (batched mode batches within each shard,
+    which can change padding).
+    Meanwhile the parent encodes the gold answers for BERTScore, so only
+    the predictions are left to encode once the workers are done.
+    The NLI counters of the shards are summed in results["SHARDS"]["nli"].
+    Pipelines using claims run on at most len(claims) questions, the
+    others on up to size (see evaluation_size).
+    """
+    global _shared
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise RuntimeError("Sharded evaluation needs the 'fork' start method (Linux/macOS)")
+
+    sizes = {
+        name: evaluation_size(dataset, claims, size, uses_claims)
+        for name, (_, uses_claims) in pipelines.items()
+    }
+    size = max(sizes.values())
+    num_shards = num_shards or os.cpu_count()
+    shards = shard_ranges(size, num_shards)
+    threads = max(1, (os.cpu_count() or 1) // len(shards))
+
+    _shared = {
+        "pipelines": pipelines,
+        "questions": [dataset[n]["question"] for n in range(size)],
+        "golds": [dataset[n]["answer"] for n in range(size)],
+        "claims": list(claims[:size]),
+        "batched": batched,
+    }
+
+    start = time.perf_counter()
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(len(shards), initializer=_init_worker, initargs=(threads,)) as pool:
+            pending = pool.imap_unordered(_run_shard, shards)
+            # Encode with the cores the workers leave free, not on top of theirs
+            parent_threads = torch.get_num_threads()
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) - threads * len(shards)))
+            try:
+                cache_gold_embeddings(_shared["golds"])
+            finally:
+                torch.set_num_threads(parent_threads)
+            shard_results = dict(pending)
+    finally:
+        golds = _shared["golds"]
+        _shared = None
+    total_time = time.perf_counter() - start
+
+    results = {}
+    for name in pipelines:
+        answers, em_scores, f1_scores = [], [], []
+        compute_time = 0.0
+        # Concatenate in dataset order, so sums match the serial run exactly
+        for shard in shards:
+            shard_result = shard_results[shard][name]
+            answers += shard_result["answers"]
+            em_scores += shard_result["em_scores"]
+            f1_scores += shard_result["f1_scores"]
+            compute_time += shard_result["time"]
+
+        results[name] = aggregate_scores(em_scores, f1_scores, answers, golds[:sizes[name]])
+        results[name]["size"] = sizes[name]
+        results[name]["compute_time"] = compute_time
+
+    nli = {}
+    for shard in shards:
+        add_counters(nli, shard_results[shard]["nli"])
+
+    results["SHARDS"] = {
+        "num_shards": len(shards),
+        "threads_per_shard": threads,
+        "total_time": total_time,
+        "questions_per_sec": sum(sizes.values()) / total_time if total_time > 0 else 0.0,
+        "nli": nli,
+    }
+
+    return results
@@ -0,0 +1,131 @@
+import io
+import os
+
+import numpy as np
+import torch
+
+
+# Inference backends supported by NLIModel
+BACKENDS = ("torch", "quantized", "onnx")
+
+
+def quantize_model(model):
+    """
+    int8 dynamic quantization of the Linear layers (weights in int8,
+    activations quantized on the fly). CPU only.
+    """
+    model.eval()
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def model_size_bytes(model):
+    """
+    Serialized size of a PyTorch model's weights, quantized weights included.
+    """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+class _LogitsOnly(torch.nn.Module):
+    """
+    Export wrapper returning a plain logits tensor instead of a ModelOutput.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class OnnxNLISession:
+    """
+    ONNX Runtime session for a sequence classification model.
+
+    The model is exported once to onnx_path and the exported file
+    is reused on later runs, as long as the model name recorded next
+    to it (in onnx_path + ".model") is model_name. load_model returns the
+    PyTorch model and is only called when an export has to be made.
+    """
+
+    def __init__(self, load_model, tokenizer, onnx_path, model_name, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The 'onnx' NLI backend requires onnxruntime (pip install onnxruntime onnx)"
+            ) from e
+
+        self.onnx_path = onnx_path
+        if self.exported_model(onnx_path) != model_name:
+            self.export(load_model(), tokenizer, onnx_path, model_name)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    @staticmethod
+    def exported_model(onnx_path):
+        """
+        Name of the model exported at onnx_path, None if there is no export.
+        """
+        if not os.path.exists(onnx_path) or not os.path.exists(f"{onnx_path}.model"):
+            return None
+        with open(f"{onnx_path}.model", encoding="utf-8") as f:
+            return f.read().strip()
+
+    @staticmethod
+    def export(model, tokenizer, onnx_path, model_name):
+        """
+        Export the model with dynamic batch and sequence axes,
+        and record model_name next to it.
+        """
+        os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+        model.eval()
+        sample = tokenizer(
+            ["A premise used for export."], ["A hypothesis."], return_tensors="pt"
+        )
+
+        tmp_path = f"{onnx_path}.tmp-{os.getpid()}"
+        with torch.no_grad():
+            torch.onnx.export(
+                _LogitsOnly(model),
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=17,
+            )
+        os.replace(tmp_path, onnx_path)
+
+        with open(f"{tmp_path}.model", "w", encoding="utf-8") as f:
+            f.write(model_name + "\n")
+        os.replace(f"{tmp_path}.model", f"{onnx_path}.model")
+
+    def __call__(self, inputs):
+        """
+        Run the session on tokenized inputs and return torch logits.
+        """
+        feeds = {
+            "input_ids": inputs["input_ids"].numpy().astype(np.int64),
+            "attention_mask": inputs["attention_mask"].numpy().astype(np.int64),
+        }
+        logits = self.session.run(["logits"], feeds)[0]
+        return torch.from_numpy(logits)
+
+    def size_bytes(self):
+        return os.path.getsize(self.onnx_path)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class NLICache:
+    """
+    Two-tier cache of NLI verdicts.
+
+    - a bounded in-memory LRU tier
+    - an optional SQLite tier on disk, which survives restarts
+
+    Values are (label, score, probs) tuples, where probs is the full
+    probability vector over the NLI labels.
+    """
+
+    def __init__(self, max_size=4096, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = None
+        if path is not None:
+            # The API calls the model from worker threads, access is serialized by self.lock.
+            # Sharded evaluation writes from several processes, wait for their locks
+            self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS nli_cache ("
+                "key TEXT PRIMARY KEY, label INTEGER, score REAL, probs TEXT)"
+            )
+            self.db.commit()
+
+    def reopen(self):
+        """
+        Open a fresh SQLite connection, e.g. in a forked process:
+        a connection must never be used by several processes.
+        """
+        self.lock = threading.Lock()
+        if self.path is not None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+
+    @staticmethod
+    def make_key(premise, hypothesis, model_signature):
+        """
+        Hash of the pair and of everything that changes the model output
+        (model name, truncation settings).
+        """
+        key = hashlib.sha256()
+        for part in (model_signature, premise, hypothesis):
+            key.update(part.encode("utf-8"))
+            key.update(b"\0")
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached (label, score, probs) for key, or None.
+        """
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT label, score, probs FROM nli_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = (row[0], row[1], json.loads(row[2]))
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put_many(self, items):
+        """
+        Store several (key, (label, score, probs)) entries at once.
+        """
+        with self.lock:
+            for key, value in items:
+                self._remember(key, value)
+
+            if self.db is not None:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO nli_cache (key, label, score, probs) VALUES (?, ?, ?, ?)",
+                    [
+                        (key, label, score, json.dumps(probs))
+                        for key, (label, score, probs) in items
+                    ]
+                )
+                self.db.commit()
+
+    def _remember(self, key, value):
+        """
+        Insert into the LRU tier, evicting the least recently used entries.
+        """
+        if self.max_size <= 0:
+            return
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop the in-memory tier and reset the counters (the disk tier is kept).
+        """
+        with self.lock:
+            self.memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        """
+        Hit/miss counters, to measure how many forward passes were saved.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
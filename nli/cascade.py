@@ -0,0 +1,127 @@
+import threading
+
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import torch
+
+from telemetry.spans import timed
+
+
+# Label order used everywhere in the repo (same as facebook/bart-large-mnli)
+LABELS = ("contradiction", "neutral", "entailment")
+ENTAILMENT = LABELS.index("entailment")
+
+
+class CascadeStage:
+    """
+    Cheap first stage of a two-stage NLI cascade.
+
+    A small distilled NLI cross-encoder scores every pair. Pairs whose
+    entailment probability falls outside the uncertainty band [low, high]
+    are resolved here; the others are sent to the large model.
+    The band should surround the filtering threshold (0.60 by default).
+    """
+
+    def __init__(
+        self,
+        model_name="cross-encoder/nli-distilroberta-base",
+        low=0.35,
+        high=0.85,
+        batch_size=32
+    ):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid uncertainty band ({low}, {high})")
+
+        self.model_name = model_name
+        self.low = low
+        self.high = high
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+
+        # Column of each repo label in this model's output
+        label2id = {
+            label.lower(): i for i, label in self.model.config.id2label.items()
+        }
+        self.label_columns = [label2id[label] for label in LABELS]
+
+        self.lock = threading.Lock()
+        self.pairs = 0
+        self.resolved_positive = 0
+        self.resolved_negative = 0
+        self.escalated = 0
+
+    def signature(self):
+        return f"cascade={self.model_name}:{self.low}:{self.high}"
+
+    @timed("nli_cascade_forward")
+    def predict(self, pairs):
+        """
+        Score pairs with the small model.
+        Returns (label, score, probs) in the repo label order.
+        """
+        results = []
+
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [premise for premise, _ in batch],
+                [hypothesis for _, hypothesis in batch],
+                return_tensors="pt",
+                truncation=True,
+                padding="longest"
+            )
+
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+
+            probs = torch.softmax(logits, dim=-1)[:, self.label_columns]
+            scores, labels = probs.max(dim=-1)
+
+            results.extend(zip(labels.tolist(), scores.tolist(), probs.tolist()))
+
+        return results
+
+    def is_uncertain(self, probs):
+        return self.low <= probs[ENTAILMENT] <= self.high
+
+    def run(self, pairs, large_predict):
+        """
+        Score pairs with the cascade: small model first, then large_predict
+        only for the pairs in the uncertainty band.
+        """
+        results = self.predict(pairs)
+        uncertain = [i for i, (_, _, probs) in enumerate(results) if self.is_uncertain(probs)]
+
+        if uncertain:
+            large_results = large_predict([pairs[i] for i in uncertain])
+            for i, result in zip(uncertain, large_results):
+                results[i] = result
+
+        uncertain_set = set(uncertain)
+        positive = sum(
+            1 for i, (_, _, probs) in enumerate(results)
+            if i not in uncertain_set and probs[ENTAILMENT] > self.high
+        )
+
+        with self.lock:
+            self.pairs += len(pairs)
+            self.escalated += len(uncertain)
+            self.resolved_positive += positive
+            self.resolved_negative += len(pairs) - len(uncertain) - positive
+
+        return results
+
+    def stats(self):
+        """
+        How many pairs each stage resolved.
+        """
+        with self.lock:
+            return {
+                "pairs": self.pairs,
+                "resolved_by_small_model": self.resolved_positive + self.resolved_negative,
+                "resolved_positive": self.resolved_positive,
+                "resolved_negative": self.resolved_negative,
+                "escalated_to_large_model": self.escalated,
+                "escalation_rate": self.escalated / self.pairs if self.pairs else 0.0,
+            }
@@ -1,5 +1,11 @@
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-from nli.subclaim import is_comparative_claim, decompose_comparative_claim
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+from nli.subclaim import decompose_many
+from nli.cache import NLICache
+from nli.backends import BACKENDS, OnnxNLISession, quantize_model, model_size_bytes
+from nli.cascade import CascadeStage
+from nli.tokens import TokenCache
+from telemetry.spans import count, timed
+import threading
 import torch
 
 
@@ -11,14 +17,118 @@ class NLIModel:
     whether they entail a given claim or its decomposed sub-claims.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size=16,
+        cache_size=4096,
+        cache_path=None,
+        backend="torch",
+        onnx_path=None,
+        cascade_model=None,
+        cascade_band=(0.35, 0.85),
+        max_premise_tokens=None,
+        model_name="facebook/bart-large-mnli"
+    ):
         """
         Load a pretrained NLI model and tokenizer once,
         to avoid repeated initialization during inference.
+
+        batch_size is the maximum number of premise/hypothesis
+        pairs scored together in one padded forward pass. Pairs are
+        bucketed by token length so each batch needs little padding.
+
+        Premises are truncated to max_premise_tokens (None keeps as much
+        as the model accepts next to the hypothesis).
+
+        Verdicts are cached in an LRU of cache_size entries and,
+        if cache_path is given, in a SQLite file reused across runs.
+
+        backend selects the inference engine:
+        - "torch": fp32 PyTorch (reference)
+        - "quantized": int8 dynamic-quantized PyTorch
+        - "onnx": ONNX Runtime session, exported once to onnx_path
+          (by default data/onnx/<model_name with "/" as "--">.onnx); the
+          PyTorch weights are only loaded when that export is missing
+        Use scripts/nli_parity.py to check accuracy drift before switching.
+
+        If cascade_model is given (e.g. "cross-encoder/nli-distilroberta-base"),
+        that small model scores every pair first and only pairs whose
+        entailment probability lies in cascade_band go to bart-large-mnli.
+
+        model_name only needs changing for tests and benchmarks: the
+        label order (contradiction, neutral, entailment) of
+        bart-large-mnli is assumed everywhere else.
         """
-        model_name = "facebook/bart-large-mnli"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown NLI backend {backend!r}, expected one of {BACKENDS}")
+
+        self.model_name = model_name
+        self.backend = backend
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model = None
+        self.onnx_session = None
+
+        # Some tokenizers report no limit (a huge model_max_length)
+        config = AutoConfig.from_pretrained(model_name)
+        self.max_length = min(
+            self.tokenizer.model_max_length,
+            getattr(config, "max_position_embeddings", None) or self.tokenizer.model_max_length
+        )
+
+        if backend == "onnx":
+            if onnx_path is None:
+                onnx_path = f"data/onnx/{model_name.replace('/', '--')}.onnx"
+            # The PyTorch weights are only loaded if the model must be exported
+            self.onnx_session = OnnxNLISession(
+                lambda: AutoModelForSequenceClassification.from_pretrained(model_name),
+                self.tokenizer, onnx_path, model_name
+            )
+        else:
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            self.model.eval()
+            if backend == "quantized":
+                self.model = quantize_model(self.model)
+
+        self.batch_size = batch_size
+        self.max_premise_tokens = max_premise_tokens
+
+        # Tokenizations of chunks and claims, computed once (see pretokenize)
+        self.token_cache = TokenCache(self.tokenizer)
+        self.cache = NLICache(max_size=cache_size, path=cache_path)
+
+        # Cumulative count of NLI pairs scored and skipped by the filters
+        self.filter_stats = {"subclaim_pairs_scored": 0, "subclaim_pairs_saved": 0}
+        self.stats_lock = threading.Lock()
+
+        self.cascade = None
+        if cascade_model is not None:
+            low, high = cascade_band
+            self.cascade = CascadeStage(cascade_model, low, high, batch_size=2 * batch_size)
+
+        # Optional scheduler merging forward passes of concurrent callers
+        # (see api.batching.MicroBatcher), set by the API
+        self.batcher = None
+
+    def signature(self):
+        """
+        Everything that changes the model output for a given pair,
+        used in the cache keys.
+        """
+        signature = (
+            f"{self.model_name}|backend={self.backend}|"
+            f"max_length={self.max_length}|max_premise_tokens={self.max_premise_tokens}"
+        )
+        if self.cascade is not None:
+            signature += "|" + self.cascade.signature()
+        return signature
+
+    def size_bytes(self):
+        """
+        Size of the weights used for inference by the selected backend.
+        """
+        if self.onnx_session is not None:
+            return self.onnx_session.size_bytes()
+        return model_size_bytes(self.model)
 
     def nli_output(self, premise: str, hypothesis: str):
         """
@@ -30,24 +140,130 @@ class NLIModel:
             predicted_score (float):
                 Confidence score for the predicted label.
         """
-        inputs = self.tokenizer(
-            premise,
-            hypothesis,
-            return_tensors="pt",
-            truncation=True,
-            padding="longest"
-        )
+        return self.nli_output_batch([(premise, hypothesis)])[0]
+
+    def nli_output_batch(self, pairs):
+        """
+        Run NLI inference on a list of (premise, hypothesis) pairs.
+
+        Returns a list of (predicted_label, predicted_score),
+        in the same order as the input pairs.
+        """
+        return [(label, score) for label, score, _ in self.nli_probs_batch(pairs)]
+
+    @timed("nli")
+    def nli_probs_batch(self, pairs):
+        """
+        Same as nli_output_batch, with the full probability vector.
+
+        Cached verdicts are reused; the remaining pairs are scored in
+        padded batches of at most batch_size, so a whole request
+        (or several requests) costs a handful of forward passes
+        instead of one per pair.
+
+        Returns a list of (predicted_label, predicted_score, probs).
+        """
+        signature = self.signature()
+        keys = [NLICache.make_key(premise, hypothesis, signature) for premise, hypothesis in pairs]
+        results = [self.cache.get(key) for key in keys]
+
+        # Score each missing pair once, even if it appears several times
+        missing = {}
+        for key, pair, result in zip(keys, pairs, results):
+            if result is None:
+                missing.setdefault(key, pair)
+
+        count("nli_pairs", len(pairs))
+        count("nli_pairs_scored", len(missing))
+
+        if missing:
+            predict = self.batcher.submit if self.batcher is not None else self.predict
+            if self.cascade is not None:
+                computed = self.cascade.run(list(missing.values()), predict)
+            else:
+                computed = predict(list(missing.values()))
+            computed = list(zip(missing, computed))
+            self.cache.put_many(computed)
+            computed = dict(computed)
+            results = [
+                result if result is not None else computed[key]
+                for key, result in zip(keys, results)
+            ]
+
+        return results
+
+    def pretokenize(self, texts):
+        """
+        Tokenize corpus chunks ahead of time (e.g. at index build time),
+        so requests never pay the tokenizer for them.
+        """
+        self.token_cache.add_many(texts)
+        return len(self.token_cache)
+
+    def encode_pairs(self, pairs):
+        """
+        Input ids of each (premise, hypothesis) pair, built from cached
+        tokenizations. Only the premise is truncated, to the premise
+        budget and to what fits next to the hypothesis.
+        """
+        premise_ids = self.token_cache.get_many([premise for premise, _ in pairs])
+        hypothesis_ids = self.token_cache.get_many([hypothesis for _, hypothesis in pairs])
+        special = self.tokenizer.num_special_tokens_to_add(pair=True)
 
-        # Disable gradient computation for inference
-        with torch.no_grad():
-            logits = self.model(**inputs).logits
+        encoded = []
+        for p_ids, h_ids in zip(premise_ids, hypothesis_ids):
+            h_ids = h_ids[:self.max_length - special]
+            budget = self.max_length - special - len(h_ids)
+            if self.max_premise_tokens is not None:
+                budget = min(budget, self.max_premise_tokens)
+            encoded.append(
+                self.tokenizer.build_inputs_with_special_tokens(p_ids[:budget], h_ids)
+            )
 
-        probs = torch.softmax(logits, dim=-1)[0]
+        return encoded
 
-        predicted_label = torch.argmax(probs).item()
-        predicted_score = probs[predicted_label].item()
+    @timed("nli_forward")
+    def predict(self, pairs):
+        """
+        Forward pass over (premise, hypothesis) pairs, without cache.
+
+        Pairs are sorted by total token length and batched in that
+        order, so padded positions (and their attention FLOPs) stay
+        minimal; results are returned in input order.
+        """
+        encoded = self.encode_pairs(pairs)
+        count("nli_tokens_in", sum(len(ids) for ids in encoded))
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        results = [None] * len(encoded)
 
-        return predicted_label, predicted_score
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = order[start:start + self.batch_size]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [encoded[i] for i in batch_ids]},
+                return_tensors="pt"
+            )
+
+            if self.onnx_session is not None:
+                logits = self.onnx_session(inputs)
+            else:
+                # Disable gradient computation for inference
+                with torch.no_grad():
+                    logits = self.model(**inputs).logits
+
+            probs = torch.softmax(logits, dim=-1)
+            scores, labels = probs.max(dim=-1)
+
+            for i, result in zip(batch_ids, zip(labels.tolist(), scores.tolist(), probs.tolist())):
+                results[i] = result
+
+        return results
+
+    @staticmethod
+    def is_entailed(label, score, threshold=0.60):
+        """
+        Decision rule shared by all filtering methods.
+        """
+        return label == 2 and score > threshold
 
     def nli_passage_basic(self, claim, passages_rag, threshold=0.60):
         """
@@ -57,14 +273,31 @@ class NLIModel:
         If no passage passes the entailment threshold,
         the original passages are returned as a fallback.
         """
-        entail_passages = []
+        return self.nli_passage_basic_many([claim], [passages_rag], threshold)[0]
+
+    def nli_passage_basic_many(self, claims, passages_list, threshold=0.60):
+        """
+        Batched version of nli_passage_basic over several requests.
+
+        All (passage, claim) pairs of all requests are scored together,
+        then split back per request.
+        """
+        pairs = [
+            (premise, claim)
+            for claim, passages_rag in zip(claims, passages_list)
+            for premise in passages_rag
+        ]
+        verdicts = iter(self.nli_output_batch(pairs))
 
-        for premise in passages_rag:
-            label, score = self.nli_output(premise, claim)
-            if label == 2 and score > threshold:
-                entail_passages.append(premise)
+        filtered = []
+        for passages_rag in passages_list:
+            entail_passages = [
+                premise for premise in passages_rag
+                if self.is_entailed(*next(verdicts), threshold)
+            ]
+            filtered.append(entail_passages if entail_passages else passages_rag)
 
-        return entail_passages if entail_passages else passages_rag
+        return filtered
 
     def nli_passage_subclaim(self, claim, passages_rag, threshold=0.60):
         """
@@ -73,26 +306,109 @@ class NLIModel:
         Comparative or conjunctive claims are split into sub-claims,
         which are verified independently against each passage.
         """
-        entail_passages = []
+        return self.nli_passage_subclaim_many([claim], [passages_rag], threshold)[0]
+
+    def nli_passage_subclaim_many(self, claims, passages_list, threshold=0.60):
+        """
+        Batched version of nli_passage_subclaim over several requests.
+        """
+        return [
+            result["passages"]
+            for result in self.nli_subclaim_filter_many(claims, passages_list, threshold)
+        ]
+
+    def nli_subclaim_filter(self, claim, passages_rag, threshold=0.60):
+        """
+        Sub-claim filtering with the full per-pair detail, see nli_subclaim_filter_many.
+        """
+        return self.nli_subclaim_filter_many([claim], [passages_rag], threshold)[0]
 
-        for premise in passages_rag:
+    @timed("nli_subclaim_filter")
+    def nli_subclaim_filter_many(self, claims, passages_list, threshold=0.60):
+        """
+        Sub-claim filtering engine over several requests.
 
-            # Handle comparative or conjunctive claims via decomposition
-            if is_comparative_claim(claim):
-                sub_claims = decompose_comparative_claim(claim)
+        Each claim is decomposed once. Sub-claims are then checked in
+        rounds: round r scores sub-claim r against every passage whose
+        keep decision is not final yet, for all requests in one batched
+        call. A passage is kept as soon as it entails one sub-claim,
+        so its remaining sub-claims are never scored.
 
-                for sub in sub_claims:
-                    label, score = self.nli_output(premise, sub)
-                    if label == 2 and score > threshold:
-                        entail_passages.append(premise)
+        Returns one dict per request:
+        - subclaims: the decomposed sub-claims (or [claim])
+        - passages: kept passages, or the original ones as a fallback
+        - verdicts: matrix [passage][sub-claim] of
+          {"label", "score", "entailed"}, None for pairs never scored
+        - nli_calls: number of (passage, sub-claim) pairs scored
+        - nli_calls_saved: number of pairs skipped by short-circuiting
+        """
+        requests = []
 
-            # Handle standard (non-comparative) claims directly
-            else:
-                label, score = self.nli_output(premise, claim)
-                if label == 2 and score > threshold:
-                    entail_passages.append(premise)
+        # Comparative or conjunctive claims are decomposed,
+        # standard (non-comparative) claims give [claim]
+        for sub_claims, passages_rag in zip(decompose_many(claims), passages_list):
+
+            requests.append({
+                "subclaims": sub_claims,
+                "verdicts": [[None] * len(sub_claims) for _ in passages_rag],
+                "kept": [False] * len(passages_rag),
+            })
+
+        rounds = max((len(request["subclaims"]) for request in requests), default=0)
+
+        for r in range(rounds):
+            # Pairs whose passage is still undecided for this sub-claim
+            pending = [
+                (i, j)
+                for i, request in enumerate(requests)
+                if r < len(request["subclaims"])
+                for j, kept in enumerate(request["kept"])
+                if not kept
+            ]
+            if not pending:
+                break
+
+            pairs = [
+                (passages_list[i][j], requests[i]["subclaims"][r])
+                for i, j in pending
+            ]
+
+            for (i, j), (label, score) in zip(pending, self.nli_output_batch(pairs)):
+                entailed = self.is_entailed(label, score, threshold)
+                requests[i]["verdicts"][j][r] = {
+                    "label": label,
+                    "score": score,
+                    "entailed": entailed,
+                }
+                if entailed:
+                    requests[i]["kept"][j] = True
+
+        results = []
+        for request, passages_rag in zip(requests, passages_list):
+            entail_passages = [
+                premise for premise, kept in zip(passages_rag, request["kept"]) if kept
+            ]
+
+            # Remove duplicates while preserving insertion order
+            entail_passages = list(dict.fromkeys(entail_passages))
+
+            total = len(passages_rag) * len(request["subclaims"])
+            nli_calls = sum(
+                verdict is not None
+                for row in request["verdicts"]
+                for verdict in row
+            )
+
+            results.append({
+                "subclaims": request["subclaims"],
+                "passages": entail_passages if entail_passages else passages_rag,
+                "verdicts": request["verdicts"],
+                "nli_calls": nli_calls,
+                "nli_calls_saved": total - nli_calls,
+            })
 
-        # Remove duplicates while preserving insertion order
-        entail_passages = list(dict.fromkeys(entail_passages))
+        with self.stats_lock:
+            self.filter_stats["subclaim_pairs_scored"] += sum(r["nli_calls"] for r in results)
+            self.filter_stats["subclaim_pairs_saved"] += sum(r["nli_calls_saved"] for r in results)
 
-        return entail_passages if entail_passages else passages_rag
+        return results
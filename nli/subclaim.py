@@ -1,23 +1,15 @@
 import re
+from collections import namedtuple
+from functools import lru_cache
 
-def is_comparative_claim(claim: str) -> bool:
-    """
-    Detects whether a claim is comparative (AND) or disjunctive (OR).
-    Used to decide whether claim decomposition should be applied.
-    """
-    comparative_patterns = [
-        r"and.*share\s+the\s+same",
-        r"and.*both",
-        r"and.*located\s+in\s+the\s+same",
-        r"and.*same",
-        r"one\s+of\s+.+\s+or\s+.+",
-    ]
-    
-    for pattern in comparative_patterns:
-        if re.search(pattern, claim, re.IGNORECASE):
-            return True
-    
-    return False
+
+# Result of analyze_claim:
+# - rule: name of the decomposition rule that matched, None if none did
+# - comparative: whether the claim is comparative (AND) or disjunctive (OR)
+# - parts: stripped groups captured by the rule, () if no rule matched
+# Sub-claims are only built on demand (see subclaims_of): a builder may
+# fail on odd inputs, which must not affect the classification.
+ClaimAnalysis = namedtuple("ClaimAnalysis", ["rule", "comparative", "parts"])
 
 
 def extract_property(claim: str) -> str:
@@ -26,7 +18,7 @@ def extract_property(claim: str) -> str:
     to formulate property-based sub-claims for NLI validation.
     """
     claim_lower = claim.lower()
-    
+
     if 'older' in claim_lower or 'younger' in claim_lower:
         return 'age'
     if 'born' in claim_lower and ('earlier' in claim_lower or 'later' in claim_lower):
@@ -41,81 +33,138 @@ def extract_property(claim: str) -> str:
         return 'ancestors'
     if 'animation' in claim_lower or 'known for' in claim_lower:
         return 'domain'
-    
+
     return 'attribute'
 
 
+def _share_same(claim, s1, s2, attr):
+    return [f"{s1} has {attr}", f"{s2} has {attr}"]
+
+
+def _are_both(claim, s1, s2, pred):
+    article = "an" if pred[0].lower() in "aeiou" else "a"
+    return [f"{s1} is {article} {pred}", f"{s2} is {article} {pred}"]
+
+
+def _located_same(claim, s1, s2, loc):
+    return [f"{s1} is located in {loc}", f"{s2} is located in {loc}"]
+
+
+def _are_same(claim, s1, s2, attr):
+    return [f"{s1} is {attr}", f"{s2} is {attr}"]
+
+
+def _one_of(claim, s1, s2):
+    prop = extract_property(claim)
+    return [
+        f"There is information about {prop} {s1}.",
+        f"There is information about {prop} {s2}."
+    ]
+
+
+# Decomposition rules, tried in order: (name, pattern, sub-claim builder).
+#
+# Comparative examples:
+# - "X and Y share the same ATTRIBUTE"
+#   → ["X has ATTRIBUTE", "Y has ATTRIBUTE"]
+#
+# Disjunctive examples:
+# - "One of X or Y ..."
+#   → ["There is information about PROPERTY X",
+#      "There is information about PROPERTY Y"]
+RULES = [
+    ("share_same", r"(.+?)\s+and\s+(.+?)\s+share\s+the\s+same\s+(.+?)\.?$", _share_same),
+    ("are_both", r"(.+?)\s+and\s+(.+?)\s+are\s+both\s+(.+?)\.?$", _are_both),
+    ("located_same", r"(.+?)\s+and\s+(.+?)\s+are\s+located\s+in\s+the\s+same\s+(.+?)\.?$", _located_same),
+    ("are_same", r"(.+?)\s+and\s+(.+?)\s+are\s+the\s+same\s+(.+?)\.?$", _are_same),
+    ("one_of", r"One\s+of\s+(.+?)\s+or\s+(.+?)\s+(?:is|was|has|have|had|does|do|did).+", _one_of),
+]
+
+# All rules as the alternatives of one anchored pattern: alternatives are
+# tried in order, so the first matching rule wins, as with separate matches.
+# Each alternative is wrapped in a named group to know which one matched.
+_RULES_PATTERN = re.compile(
+    "^(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in RULES) + ")",
+    re.IGNORECASE
+)
+_BUILDERS = {name: builder for name, _, builder in RULES}
+# Group index of each rule's first sub-group, and its number of sub-groups
+_RULE_GROUPS = {
+    name: (_RULES_PATTERN.groupindex[name] + 1, re.compile(pattern).groups)
+    for name, pattern, _ in RULES
+}
+
+# Comparative (AND) or disjunctive (OR) claims, searched anywhere in the claim
+COMPARATIVE_PATTERNS = [
+    r"and.*share\s+the\s+same",
+    r"and.*both",
+    r"and.*located\s+in\s+the\s+same",
+    r"and.*same",
+    r"one\s+of\s+.+\s+or\s+.+",
+]
+_COMPARATIVE_PATTERN = re.compile("|".join(COMPARATIVE_PATTERNS), re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def analyze_claim(claim: str) -> ClaimAnalysis:
+    """
+    Classify a claim and find its decomposition rule in a single pass
+    over the rule table.
+
+    Every rule implies a comparative claim, so the comparative
+    search only runs for claims that no rule decomposes (or that
+    span several lines, where "." in the search does not match).
+    Results are memoized on the claim text.
+    """
+    match = _RULES_PATTERN.match(claim)
+
+    if match is None:
+        comparative = _COMPARATIVE_PATTERN.search(claim) is not None
+        return ClaimAnalysis(None, comparative, ())
+
+    comparative = "\n" not in claim or _COMPARATIVE_PATTERN.search(claim) is not None
+    rule = match.lastgroup
+    first, count = _RULE_GROUPS[rule]
+    parts = [match.group(i).strip() for i in range(first, first + count)]
+
+    return ClaimAnalysis(rule, comparative, tuple(parts))
+
+
+@lru_cache(maxsize=4096)
+def subclaims_of(claim: str) -> tuple:
+    """
+    Sub-claims of a claim from the rule matched by analyze_claim,
+    (claim,) if no rule matched. Results are memoized on the claim text.
+    """
+    analysis = analyze_claim(claim)
+    if analysis.rule is None:
+        return (claim,)
+    return tuple(_BUILDERS[analysis.rule](claim, *analysis.parts))
+
+
+def is_comparative_claim(claim: str) -> bool:
+    """
+    Detects whether a claim is comparative (AND) or disjunctive (OR).
+    Used to decide whether claim decomposition should be applied.
+    """
+    return analyze_claim(claim).comparative
+
+
 def decompose_comparative_claim(claim: str) -> list[str]:
     """
-    Decomposes comparative (AND) and disjunctive (OR) claims into simpler sub-claims.
-    
-    Comparative examples:
-    - "X and Y share the same ATTRIBUTE"
-      → ["X has ATTRIBUTE", "Y has ATTRIBUTE"]
-    
-    Disjunctive examples:
-    - "One of X or Y ..."
-      → ["There is information about PROPERTY X",
-         "There is information about PROPERTY Y"]
-    
-    If no pattern matches, the original claim is returned.
+    Decomposes comparative (AND) and disjunctive (OR) claims into simpler sub-claims
+    (see RULES). If no pattern matches, the original claim is returned.
+    """
+    return list(subclaims_of(claim))
+
+
+def decompose_many(claims) -> list[list[str]]:
+    """
+    Sub-claims checked by NLI for several claims: the decomposition of
+    comparative claims, [claim] for the others.
+    Repeated claims are analyzed once.
     """
-    
-    sub_claims = []
-
-    # -------- Comparative (AND) patterns --------
-    
-    match = re.match(
-        r"^(.+?)\s+and\s+(.+?)\s+share\s+the\s+same\s+(.+?)\.?$",
-        claim,
-        re.IGNORECASE
-    )
-    if match:
-        s1, s2, attr = map(str.strip, match.groups())
-        return [f"{s1} has {attr}", f"{s2} has {attr}"]
-
-    match = re.match(
-        r"^(.+?)\s+and\s+(.+?)\s+are\s+both\s+(.+?)\.?$",
-        claim,
-        re.IGNORECASE
-    )
-    if match:
-        s1, s2, pred = map(str.strip, match.groups())
-        article = "an" if pred[0].lower() in "aeiou" else "a"
-        return [f"{s1} is {article} {pred}", f"{s2} is {article} {pred}"]
-
-    match = re.match(
-        r"^(.+?)\s+and\s+(.+?)\s+are\s+located\s+in\s+the\s+same\s+(.+?)\.?$",
-        claim,
-        re.IGNORECASE
-    )
-    if match:
-        s1, s2, loc = map(str.strip, match.groups())
-        return [f"{s1} is located in {loc}", f"{s2} is located in {loc}"]
-
-    match = re.match(
-        r"^(.+?)\s+and\s+(.+?)\s+are\s+the\s+same\s+(.+?)\.?$",
-        claim,
-        re.IGNORECASE
-    )
-    if match:
-        s1, s2, attr = map(str.strip, match.groups())
-        return [f"{s1} is {attr}", f"{s2} is {attr}"]
-
-    # -------- Disjunctive (OR) pattern --------
-    
-    match = re.match(
-        r"^One\s+of\s+(.+?)\s+or\s+(.+?)\s+(?:is|was|has|have|had|does|do|did).+",
-        claim,
-        re.IGNORECASE
-    )
-    if match:
-        s1, s2 = map(str.strip, match.groups())
-        prop = extract_property(claim)
-        return [
-            f"There is information about {prop} {s1}.",
-            f"There is information about {prop} {s2}."
-        ]
-
-    # -------- Fallback --------
-    return [claim]
+    results = []
+    for claim in claims:
+        results.append(list(subclaims_of(claim)) if is_comparative_claim(claim) else [claim])
+    return results
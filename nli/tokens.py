@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    LRU memo of text tokenizations (token ids without special tokens).
+
+    Corpus chunks can be tokenized once at index build time with
+    add_many; other texts (claims, sub-claims, new passages) are
+    tokenized on first use and reused afterwards.
+    """
+
+    def __init__(self, tokenizer, max_size=100_000):
+        self.tokenizer = tokenizer
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add_many(self, texts):
+        """
+        Tokenize texts that are not cached yet, in one batched tokenizer call.
+        """
+        with self.lock:
+            missing = list(dict.fromkeys(t for t in texts if t not in self.entries))
+
+        if not missing:
+            return
+
+        encoded = self.tokenizer(missing, add_special_tokens=False)["input_ids"]
+
+        with self.lock:
+            for text, ids in zip(missing, encoded):
+                self.entries[text] = ids
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_many(self, texts):
+        """
+        Token ids of each text, tokenizing only the ones not seen before.
+        """
+        self.add_many(texts)
+
+        results = []
+        with self.lock:
+            for text in texts:
+                ids = self.entries.get(text)
+                if ids is None:
+                    # Evicted in between by a concurrent caller, tokenize again
+                    ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+                else:
+                    self.entries.move_to_end(text)
+                results.append(ids)
+
+        return results
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,21 +1,84 @@
 from abc import ABC, abstractmethod
 
+from rag.prompt import create_prompt
+
 
 
 class BasicBaseline(ABC):
     """
-    
+
     Abstract base class for all QA pipelines.
 
+    Subclasses provide self.retriever, self.generator and self.top_k.
+    The *_many methods run each stage for a whole list of questions,
+    so retrieval, filtering and generation are batched.
+
     """
 
+    # Whether answers depend on a claim, which limits evaluation
+    # to the questions that have one
+    uses_claims = False
+
     @abstractmethod
     def answer(self, question, claim = ""):
         """
-    
-        Generating answer for a question 
+
+        Generating answer for a question
 
         """
 
         pass
-    
\ No newline at end of file
+
+    def config(self):
+        """
+        Everything that changes the answers of the pipeline,
+        used to tell whether logged evaluation results can be reused.
+        """
+        return {
+            "pipeline": type(self).__name__,
+            "top_k": self.top_k,
+            "retriever": self.retriever.signature(),
+            "generator": self.generator.model_name,
+        }
+
+    def retrieve_many(self, questions):
+        """
+        Retrieve the top_k passages of every question in one batched search.
+        """
+        passages, _, _ = self.retriever.retriever_chunk_batch(questions, self.top_k)
+        return passages
+
+    def filter_many(self, passages_list, claims):
+        """
+        Filter the retrieved passages of every question.
+        The baseline keeps all passages; NLI pipelines override this.
+        """
+        return passages_list
+
+    def build_prompts(self, questions, passages_list):
+        """
+        Build one generation prompt per question from its passages.
+        """
+        return [
+            create_prompt(question, passages)
+            for question, passages in zip(questions, passages_list)
+        ]
+
+    def generate_many(self, questions, passages_list):
+        """
+        Build one prompt per question and generate all answers in batches.
+        """
+        prompts = self.build_prompts(questions, passages_list)
+        return self.generator.generate_answers(prompts)
+
+    def answer_many(self, questions, claims = None):
+        """
+        Batched version of answer over a list of questions (and claims).
+        """
+        if claims is None:
+            claims = [""] * len(questions)
+
+        passages_list = self.retrieve_many(questions)
+        filtered_passages = self.filter_many(passages_list, claims)
+
+        return self.generate_many(questions, filtered_passages)
@@ -13,6 +13,8 @@ class RAG_NLI(BasicBaseline):
     entail the full claim before answer generation.
     """
 
+    uses_claims = True
+
     def __init__(self, retriever: BasicRetriever, generator: Generator, nli_model: NLIModel, top_k=2):
         self.retriever = retriever
         self.top_k = top_k
@@ -29,3 +31,13 @@ class RAG_NLI(BasicBaseline):
         prompt = create_prompt(question, filtered_passages)
 
         return self.generator.generate_answer(prompt)
+
+    def config(self):
+        return {**super().config(), "nli": self.nli_model.signature()}
+
+    def filter_many(self, passages_list, claims):
+        """
+        Score the passages of all questions against their claims
+        in one batched NLI call.
+        """
+        return self.nli_model.nli_passage_basic_many(claims, passages_list)
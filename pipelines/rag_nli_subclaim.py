@@ -3,7 +3,6 @@ from rag.generator import Generator
 from rag.prompt import create_prompt
 from pipelines.base import BasicBaseline
 from nli.nli_class import NLIModel
-from nli.subclaim import decompose_comparative_claim, is_comparative_claim
 
 
 class RAG_NLI_Subclaim(BasicBaseline):
@@ -14,6 +13,8 @@ class RAG_NLI_Subclaim(BasicBaseline):
     into sub-claims, which are verified independently using NLI.
     """
 
+    uses_claims = True
+
     def __init__(
         self,
         retriever: BasicRetriever,
@@ -37,6 +38,16 @@ class RAG_NLI_Subclaim(BasicBaseline):
 
         return self.generator.generate_answer(prompt)
 
+    def config(self):
+        return {**super().config(), "nli": self.nli_model.signature()}
+
+    def filter_many(self, passages_list, claims):
+        """
+        Score the passages of all questions against their sub-claims,
+        with one batched NLI call per sub-claim round.
+        """
+        return self.nli_model.nli_passage_subclaim_many(claims, passages_list)
+
     def answer_for_agent(self, question, claim=""):
         """
         Extended version used for analysis and visualization.
@@ -46,15 +57,12 @@ class RAG_NLI_Subclaim(BasicBaseline):
         - original retrieved passages
         - NLI-filtered passages
         - final generated answer
+        - NLI verdict matrix [passage][sub-claim] (None where skipped)
         """
-        if is_comparative_claim(claim):
-            subclaims = decompose_comparative_claim(claim)
-        else:
-            subclaims = [claim]
-
         passages_rag = self.retriever.retriever_chunk(question, self.top_k)
-        filtered_passages = self.nli_model.nli_passage_subclaim(claim, passages_rag)
+        nli_result = self.nli_model.nli_subclaim_filter(claim, passages_rag)
+        filtered_passages = nli_result["passages"]
         prompt = create_prompt(question, filtered_passages)
         answer = self.generator.generate_answer(prompt)
 
-        return subclaims, passages_rag, filtered_passages, answer
+        return nli_result["subclaims"], passages_rag, filtered_passages, answer, nli_result["verdicts"]
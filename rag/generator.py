@@ -1,32 +1,128 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration, AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import T5Tokenizer, T5ForConditionalGeneration, AutoTokenizer, AutoModelForSeq2SeqLM, TextIteratorStreamer
 from .prompt import create_prompt
+import threading
+
+from telemetry.spans import count, span, timed
 
 
 class Generator():
     """
-    
-    Initialize the model 
+
+    Initialize the model
 
     and Generate an answer
 
     """
 
-    def __init__(self, model_name = "google/flan-t5-small"):
+    def __init__(self, model_name = "google/flan-t5-small", batch_size = 8):
         """
         Load the appropriate tokenizer and model depending on architecture.
+
+        batch_size is the default number of prompts generated together
+        by generate_answers.
         """
-        if model_name == "allenai/unifiedqa-t5-small": 
+        self.model_name = model_name
+        if model_name == "allenai/unifiedqa-t5-small":
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
             self.gen_model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-        else : 
+        else :
             self.tokenizer = T5Tokenizer.from_pretrained(model_name)
             self.gen_model = T5ForConditionalGeneration.from_pretrained(model_name)
+        self.batch_size = batch_size
+
+        # Optional scheduler merging prompts of concurrent callers
+        # (see api.batching.MicroBatcher), set by the API
+        self.batcher = None
 
     def generate_answer(self, prompt):
-        prompt = prompt
+        return self.generate_answers([prompt])[0]
+
+    def stream_answer(self, prompt, timeout=60.0):
+        """
+        Generate an answer for one prompt, yielding text pieces
+        as soon as the model produces them.
+
+        Generation runs in a background thread feeding a text streamer;
+        this generator blocks until the next piece is available, at most
+        timeout seconds (then queue.Empty is raised). An error raised by
+        the generation is re-raised here once the stream is drained.
+        """
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout
+        )
         inputs = self.tokenizer(prompt, return_tensors="pt", max_length=512, truncation=True)
-        outputs = self.gen_model.generate(**inputs, max_new_tokens=100)
-        answer = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return answer
+
+        count("generator_tokens_in", inputs["input_ids"].shape[1])
+
+        errors = []
+
+        def generate():
+            try:
+                self.gen_model.generate(**inputs, max_new_tokens=100, streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer, which would otherwise wait forever
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+
+        with span("generate_stream"):
+            thread.start()
+
+            for piece in streamer:
+                if piece:
+                    yield piece
+
+            thread.join()
+            if errors:
+                raise errors[0]
+
+    @timed("generate")
+    def generate_answers(self, prompts, batch_size = None):
+        """
+        Generate answers for a list of prompts, in padded batches.
+
+        When a batcher is attached, the prompts are merged with those
+        of concurrent callers before generation.
+        """
+        if self.batcher is not None:
+            return self.batcher.submit(prompts)
+
+        return self.generate_batch(prompts, batch_size)
+
+    @timed("generate_forward")
+    def generate_batch(self, prompts, batch_size = None):
+        """
+        Generate answers for a list of prompts, in padded batches.
+
+        Prompts are sorted by token length before batching so that
+        each batch holds prompts of similar length and little padding.
+        Answers are returned in the same order as the input prompts.
+        """
+        if len(prompts) == 0:
+            return []
+
+        batch_size = batch_size or self.batch_size
+        encoded = self.tokenizer(list(prompts), max_length=512, truncation=True)["input_ids"]
+        count("generator_tokens_in", sum(len(ids) for ids in encoded))
+
+        # Longest prompts first, so an out-of-memory batch shows up immediately
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]), reverse=True)
+        answers = [None] * len(encoded)
+
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start:start + batch_size]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [encoded[i] for i in batch_ids]},
+                return_tensors="pt"
+            )
+            outputs = self.gen_model.generate(**inputs, max_new_tokens=100)
+            count("generator_tokens_out", int((outputs != self.tokenizer.pad_token_id).sum()))
+            decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+            for i, answer in zip(batch_ids, decoded):
+                answers[i] = answer
+
+        return answers
 
 
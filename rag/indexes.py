@@ -0,0 +1,160 @@
+import faiss
+import numpy as np
+
+
+# Supported index types for BasicRetriever
+INDEX_TYPES = ("flat_l2", "flat_ip", "ivf", "hnsw", "ivfpq")
+
+# Default parameters, overridable through index_params
+DEFAULT_INDEX_PARAMS = {
+    "nlist": None,        # IVF cells, defaults to ~4 * sqrt(n)
+    "nprobe": 8,          # IVF cells visited per query
+    "hnsw_m": 32,         # HNSW graph degree
+    "ef_construction": 40,
+    "ef_search": 64,      # HNSW candidate list size per query
+    "pq_m": 16,           # PQ sub-quantizers, must divide the dimension
+    "pq_nbits": 8,
+}
+
+# Parameters that only affect search and can change without a rebuild
+SEARCH_PARAMS = ("nprobe", "ef_search")
+
+
+def resolve_index_params(index_type, index_params=None):
+    """
+    Validate the index type and merge user parameters with the defaults.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}"
+        )
+
+    params = dict(DEFAULT_INDEX_PARAMS)
+    params.update(index_params or {})
+    return params
+
+
+def build_params_key(index_type, params):
+    """
+    String describing the parameters that change the index content.
+
+    Used in the retriever cache key; search-time parameters are excluded
+    so that tuning nprobe or ef_search reuses the cached index.
+    """
+    build_params = {
+        name: value for name, value in sorted(params.items())
+        if name not in SEARCH_PARAMS
+    }
+    return f"{index_type}|{build_params}"
+
+
+def create_index(dim, n, index_type="flat_l2", params=None):
+    """
+    Create an empty FAISS index of the requested type for n vectors of size dim.
+
+    - flat_l2: exact search on L2 distance (historical default)
+    - flat_ip: exact search on inner product (cosine for normalized vectors)
+    - ivf:     inverted file over flat vectors, tuned with nprobe
+    - hnsw:    graph-based index, tuned with ef_search
+    - ivfpq:   inverted file with product-quantized vectors (compressed)
+
+    IVF variants must be trained (see train_index) before vectors are added.
+    """
+    params = resolve_index_params(index_type, params)
+
+    if index_type == "flat_l2":
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "flat_ip":
+        return faiss.IndexFlatIP(dim)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["ef_construction"]
+        return index
+
+    # IVF needs at least one training point per cell
+    nlist = params["nlist"] or max(1, int(4 * np.sqrt(n)))
+    nlist = min(nlist, n)
+    quantizer = faiss.IndexFlatIP(dim)
+
+    if index_type == "ivf":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+
+    if dim % params["pq_m"] != 0:
+        raise ValueError(
+            f"pq_m={params['pq_m']} must divide the embedding dimension {dim}"
+        )
+    return faiss.IndexIVFPQ(
+        quantizer, dim, nlist, params["pq_m"], params["pq_nbits"],
+        faiss.METRIC_INNER_PRODUCT
+    )
+
+
+def id_mapped(index):
+    """
+    Index searchable by external ids (add_with_ids / remove_ids).
+    IVF indexes store ids natively, the others are wrapped in an IndexIDMap2.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def base_index(index):
+    """
+    Underlying index of an id-mapped index.
+    """
+    if hasattr(index, "id_map"):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def training_size(index):
+    """
+    Number of vectors to collect before training the index (0 if it needs no training).
+    FAISS uses at most 256 points per IVF cell for k-means, more is wasted.
+    """
+    if index.is_trained:
+        return 0
+    return 256 * index.nlist
+
+
+def build_index(embeddings, index_type="flat_l2", params=None):
+    """
+    Build and fill a FAISS index of the requested type from in-memory embeddings.
+    """
+    params = resolve_index_params(index_type, params)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n, dim = embeddings.shape
+
+    index = create_index(dim, n, index_type, params)
+    if not index.is_trained:
+        index.train(embeddings)
+
+    index.add(embeddings)
+    configure_search(index, index_type, params)
+
+    return index
+
+
+def configure_search(index, index_type, params=None):
+    """
+    Apply search-time parameters (nprobe, ef_search) to an index,
+    including one loaded from disk.
+    """
+    params = resolve_index_params(index_type, params)
+
+    if index_type in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    elif index_type == "hnsw":
+        base_index(index).hnsw.efSearch = params["ef_search"]
+
+    return index
+
+
+def index_memory_bytes(index):
+    """
+    Approximate memory footprint of an index, measured as its serialized size.
+    """
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,84 @@
+import itertools
+import json
+import time
+
+
+def iter_examples(source):
+    """
+    Iterate over corpus examples from any source:
+    - a path to a JSONL file (one JSON object per line), read lazily
+    - any iterable of dicts: a list, a HF Dataset, or a streaming HF IterableDataset
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        yield from source
+
+
+def example_chunks(example):
+    """
+    Chunks of one example.
+
+    HotpotQA examples give one chunk per context paragraph (its sentences
+    joined); plain documents give their "text" field.
+    """
+    if "context" in example:
+        for sentences in example["context"]["sentences"]:
+            yield " ".join(sentences)
+    else:
+        yield example["text"]
+
+
+def iter_chunks(source, max_examples=None):
+    """
+    Stream the chunks of the first max_examples examples (all if None).
+    """
+    examples = iter_examples(source)
+    if max_examples is not None:
+        examples = itertools.islice(examples, max_examples)
+
+    for example in examples:
+        yield from example_chunks(example)
+
+
+def batched(iterable, size):
+    """
+    Split an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ProgressReport:
+    """
+    Periodic progress/throughput line for long ingestions.
+    """
+
+    def __init__(self, total, name="ingest", every=2.0, enabled=True):
+        self.total = total
+        self.name = name
+        self.every = every
+        self.enabled = enabled
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def update(self, count):
+        self.done += count
+        now = time.perf_counter()
+        if self.enabled and (now - self.last >= self.every or self.done == self.total):
+            self.last = now
+            self.print(now)
+
+    def print(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        print(f"[{self.name}] {self.done}/{self.total} chunks, {rate:.0f} chunks/s, {elapsed:.1f}s")
@@ -1,50 +1,397 @@
 import faiss
 from sentence_transformers import SentenceTransformer
-import numpy as np 
+import numpy as np
 from datasets import load_dataset
+import hashlib
+import json
+import os
+import shutil
 
+from .indexes import (
+    build_params_key, configure_search, create_index, id_mapped, resolve_index_params, training_size
+)
+from .ingest import ProgressReport, batched, iter_chunks
+from .rwlock import ReadWriteLock
+from telemetry.spans import count, timed
 
+# Bump when the on-disk cache layout changes, to invalidate old entries
+CACHE_VERSION = 3
 
-class BasicRetriever : 
+
+class BasicRetriever :
     """
     FAISS-based dense retriever for RAG.
+
+    dataset can be a list of HotpotQA examples, a (streaming) HF dataset
+    or the path of a JSONL file; only the first max_examples examples are
+    indexed (all of them if None). Chunks are encoded encode_batch_size at
+    a time and added to the index batch by batch, so encoding memory does
+    not grow with the corpus.
+
+    If cache_dir is given, the index, the chunks and their embeddings
+    are saved there on the first run and memory-mapped on later runs
+    instead of re-encoding the whole corpus.
+
+    index_type selects the FAISS backend (see rag.indexes):
+    "flat_l2" (default), "flat_ip", "ivf", "hnsw" or "ivfpq",
+    with index_params such as nprobe, ef_search or pq_m.
+
+    The FAISS id of a chunk is its position in self.chunks. Chunks can be
+    added and removed on the live index with add_documents and
+    remove_documents; removed positions are left as None so the other ids
+    do not change. self.embeddings only covers the initial corpus.
+
+    With a cache_dir, updates are appended to updates.jsonl in the cache
+    entry and replayed when the entry is loaded, so they survive restarts
+    (added chunks are re-encoded then). Without one, they only last as
+    long as the process. Replicas sharing a cache_dir append to the same
+    log, but only see each other's updates after a restart.
     """
 
-    def __init__(self, dataset):
-        self.chunks = self.to_chunks(dataset)
-        self.model_for_rag = SentenceTransformer('all-MiniLM-L6-v2')
-        self.index = self.encode_chunk()
+    def __init__(
+        self,
+        dataset,
+        model_name='all-MiniLM-L6-v2',
+        normalize=True,
+        cache_dir=None,
+        index_type="flat_l2",
+        index_params=None,
+        max_examples=300,
+        encode_batch_size=1024,
+        progress=True
+    ):
+        self.chunks = self.to_chunks(dataset, max_examples)
+        self.model_name = model_name
+        self.normalize = normalize
+        self.index_type = index_type
+        self.index_params = resolve_index_params(index_type, index_params)
+        self.encode_batch_size = encode_batch_size
+        self.progress = progress
+        self.model_for_rag = SentenceTransformer(model_name)
+        self.embeddings = None
+
+        # Searches share the index, updates take it exclusively
+        self.lock = ReadWriteLock()
+        self.index_mmapped = False
+        self.num_removed = 0
+        # Removed vectors still in the index (HNSW cannot delete), filtered at search time
+        self.stale_ids = 0
+        # Incremented on every corpus update
+        self.version = 0
+
+        # Log of corpus updates, replayed on load (None: updates are not persisted)
+        self.updates_path = None
 
-    def to_chunks(self, dataset, ls = []):
+        if cache_dir is None:
+            self.index = self.encode_chunk()
+        else:
+            # Keyed on the initial corpus, later updates are in the entry's log
+            self.cache_path = os.path.join(cache_dir, self.cache_key())
+            if not os.path.exists(self.cache_path):
+                self.build_cache()
+            self.index = self.load_cache()
+            self.updates_path = os.path.join(self.cache_path, "updates.jsonl")
+            self.replay_updates()
+
+    def to_chunks(self, dataset, max_examples=None):
         """
         Function for transforming hotpot_qa context to chunks.
         """
-        for i in range(0,300):
-            for j in range(len(dataset[i]['context']['sentences'])):
-                sentences = " ".join(dataset[i]['context']['sentences'][j])
-                ls.append(sentences)
-        return ls
-    
-    def encode_chunk(self):
-        
-        embeddings = self.model_for_rag.encode(self.chunks, convert_to_numpy=True)
-        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
-        dim = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dim)
-        index.add(embeddings)
-
-        return index
-    
+        return list(iter_chunks(dataset, max_examples))
+
+    def encode_texts(self, texts):
+        embeddings = self.model_for_rag.encode(list(texts), convert_to_numpy=True)
+        if self.normalize:
+            embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings.astype(np.float32)
+
+    def encode_chunk(self, embeddings_path=None):
+        """
+        Encode the chunks batch by batch and add each batch to a new index.
+
+        Indexes that need training (IVF variants) buffer only the first
+        training_size vectors, train on them, then go on adding batches.
+        Embeddings are written to embeddings_path (a .npy memmap) if given,
+        otherwise they only live in the index.
+        """
+        n = len(self.chunks)
+        if n == 0:
+            raise ValueError("Cannot build a retriever on an empty corpus")
+
+        dim = self.model_for_rag.get_sentence_embedding_dimension()
+        index = id_mapped(create_index(dim, n, self.index_type, self.index_params))
+        to_train = training_size(index)
+
+        if embeddings_path is not None:
+            self.embeddings = np.lib.format.open_memmap(
+                embeddings_path, mode="w+", dtype=np.float32, shape=(n, dim)
+            )
+
+        progress = ProgressReport(n, enabled=self.progress)
+        pending, pending_count, done = [], 0, 0
+
+        for batch in batched(self.chunks, self.encode_batch_size):
+            embeddings = self.encode_texts(batch)
+            if self.embeddings is not None:
+                self.embeddings[done:done + len(batch)] = embeddings
+            done += len(batch)
+
+            if index.is_trained:
+                index.add_with_ids(embeddings, np.arange(done - len(batch), done, dtype=np.int64))
+            else:
+                pending.append(embeddings)
+                pending_count += len(embeddings)
+                if pending_count >= to_train or done == n:
+                    sample = np.concatenate(pending)
+                    index.train(sample[:to_train])
+                    index.add_with_ids(sample, np.arange(done - len(sample), done, dtype=np.int64))
+                    pending, pending_count = [], 0
+
+            progress.update(len(batch))
+
+        if self.embeddings is not None:
+            self.embeddings.flush()
+
+        return configure_search(index, self.index_type, self.index_params)
+
+    def corpus_hash(self):
+        """
+        Hash of the chunks currently indexed, with their ids.
+        """
+        corpus_hash = hashlib.sha256()
+        for chunk in self.chunks:
+            # Removed chunks keep their slot, so the ids of the others stay covered
+            if chunk is not None:
+                corpus_hash.update(chunk.encode("utf-8"))
+            corpus_hash.update(b"\0")
+        return corpus_hash.hexdigest()
+
+    def cache_key(self):
+        """
+        Versioned cache key covering the corpus content,
+        the embedding model, the normalization and the index build config.
+        """
+        config = (
+            f"{self.model_name}|normalize={self.normalize}|"
+            f"{build_params_key(self.index_type, self.index_params)}"
+        )
+        key = hashlib.sha256(
+            (self.corpus_hash() + "|" + config).encode("utf-8")
+        ).hexdigest()
+
+        return f"v{CACHE_VERSION}-{key[:16]}"
+
+    def signature(self):
+        """
+        Everything that changes the retrieved passages: corpus, model
+        and all index parameters, search-time ones included.
+        """
+        params = sorted(self.index_params.items())
+        return (
+            f"{self.model_name}|normalize={self.normalize}|{self.index_type}|{params}|"
+            f"corpus={self.corpus_hash()[:16]}"
+        )
+
+    def build_cache(self):
+        """
+        Encode the corpus and write index, chunks and embeddings to the cache directory.
+
+        Embeddings are streamed to disk during encoding. Files are written to
+        a temporary directory first and renamed, so concurrent replicas never
+        read a partially written entry.
+        """
+        tmp_path = f"{self.cache_path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        index = self.encode_chunk(os.path.join(tmp_path, "embeddings.npy"))
+        faiss.write_index(index, os.path.join(tmp_path, "index.faiss"))
+        with open(os.path.join(tmp_path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(self.chunks, f)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "model_name": self.model_name,
+                "normalize": self.normalize,
+                "index_type": self.index_type,
+                "num_chunks": len(self.chunks),
+            }, f)
+
+        # Release the write memmap before publishing, load_cache maps it read-only
+        self.embeddings = None
+        del index
+
+        try:
+            os.rename(tmp_path, self.cache_path)
+        except OSError:
+            # Another process already published the same entry
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def load_cache(self):
+        """
+        Memory-map the cached embeddings and index instead of re-encoding.
+        """
+        self.embeddings = np.load(
+            os.path.join(self.cache_path, "embeddings.npy"), mmap_mode="r"
+        )
+        with open(os.path.join(self.cache_path, "chunks.json"), encoding="utf-8") as f:
+            self.chunks = json.load(f)
+
+        index_path = os.path.join(self.cache_path, "index.faiss")
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self.index_mmapped = True
+        except RuntimeError:
+            # Not every index type supports mmap, fall back to a full read
+            index = faiss.read_index(index_path)
+
+        # Search parameters are not part of the cache key, re-apply them
+        return configure_search(index, self.index_type, self.index_params)
+
+    def num_documents(self):
+        return len(self.chunks) - self.num_removed
+
+    def ensure_writable(self):
+        """
+        A memory-mapped index is read-only: copy it in memory before the first update.
+        """
+        if self.index_mmapped:
+            self.index = configure_search(
+                faiss.clone_index(self.index), self.index_type, self.index_params
+            )
+            self.index_mmapped = False
+
+    def log_update(self, update):
+        """
+        Append a corpus update to the log of the cache entry, if any.
+        Called under the write lock, so the log follows the update order.
+        """
+        if self.updates_path is None:
+            return
+
+        with open(self.updates_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(update) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay_updates(self):
+        """
+        Re-apply the updates logged since the cache entry was built.
+        """
+        if not os.path.exists(self.updates_path):
+            return
+
+        with open(self.updates_path, "rb+") as f:
+            content = f.read()
+            # Drop a partially written last line left by a crash
+            if content and not content.endswith(b"\n"):
+                content = content[:content.rfind(b"\n") + 1]
+                f.truncate(len(content))
+
+        updates = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+        for update in updates:
+            if update["op"] == "add":
+                self.add_documents(update["texts"], log=False)
+            elif update["op"] == "remove":
+                self.remove_documents(update["ids"], log=False)
+
+        if updates:
+            print(f"Replayed {len(updates)} corpus updates from {self.updates_path}")
+
+    def add_documents(self, texts, log=True):
+        """
+        Encode and index new chunks, returns their ids.
+
+        Only the new texts are encoded, before taking the lock, so
+        in-flight searches are blocked only during the index insert.
+        The update is logged for replay on restart (see log_update).
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        embeddings = self.encode_texts(texts)
+
+        with self.lock.write():
+            self.ensure_writable()
+            start = len(self.chunks)
+            ids = np.arange(start, start + len(texts), dtype=np.int64)
+            self.index.add_with_ids(embeddings, ids)
+            self.chunks.extend(texts)
+            self.version += 1
+            if log:
+                self.log_update({"op": "add", "texts": texts})
+
+        return ids.tolist()
+
+    def remove_documents(self, ids, log=True):
+        """
+        Remove chunks from the index, returns the ids actually removed
+        (unknown or already removed ids are ignored).
+        The update is logged for replay on restart (see log_update).
+        """
+        with self.lock.write():
+            ids = sorted({
+                int(i) for i in ids
+                if 0 <= int(i) < len(self.chunks) and self.chunks[int(i)] is not None
+            })
+            if not ids:
+                return []
+
+            self.ensure_writable()
+            try:
+                self.index.remove_ids(np.array(ids, dtype=np.int64))
+            except RuntimeError:
+                # HNSW graphs do not support deletion, filter the vectors out at search time
+                self.stale_ids += len(ids)
+
+            for i in ids:
+                self.chunks[i] = None
+            self.num_removed += len(ids)
+            self.version += 1
+            if log:
+                self.log_update({"op": "remove", "ids": ids})
+
+        return ids
+
     def retriever_chunk(self, query, top_k = 2):
-        
-        query_e = self.model_for_rag.encode([query], convert_to_numpy=True)
-        query_e = query_e / np.linalg.norm(query_e, axis=1, keepdims=True)
+        """
+        Retrieve the top_k passages for a single query.
+        """
+        passages, _, _ = self.retriever_chunk_batch([query], top_k)
+
+        return passages[0]
+
+    @timed("retrieve")
+    def retriever_chunk_batch(self, queries, top_k = 2):
+        """
+        Retrieve the top_k passages for several queries at once.
+
+        All queries are encoded in one batched call and searched
+        with a single multi-query FAISS search.
+
+        Returns three lists, one entry per query:
+        - retrieved passages
+        - search scores (distance or similarity, depending on the index type)
+        - chunk ids in self.chunks
+        """
+        if len(queries) == 0:
+            return [], [], []
 
-        dis,ind = self.index.search(query_e,top_k)
-        retrieve_chunks = [self.chunks[ind_passage] for ind_passage in ind[0]]
+        count("retrieval_queries", len(queries))
+        query_e = self.encode_texts(queries)
 
-        return retrieve_chunks
-        
-    
+        passages, scores, ids = [], [], []
+        with self.lock.read():
+            dis,ind = self.index.search(query_e,top_k + self.stale_ids)
 
+            for dis_row, ind_row in zip(dis, ind):
+                # Approximate indexes return -1 when fewer than top_k hits are found
+                hits = [
+                    (int(i), float(d)) for i, d in zip(ind_row, dis_row)
+                    if i >= 0 and self.chunks[i] is not None
+                ][:top_k]
+                ids.append([i for i, _ in hits])
+                scores.append([d for _, d in hits])
+                passages.append([self.chunks[i] for i, _ in hits])
 
+        return passages, scores, ids
@@ -0,0 +1,46 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer.
+
+    Writers have priority: once a writer waits, new readers wait too,
+    so a stream of queries cannot starve an index update.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self.cond:
+            while self.writer or self.writers_waiting:
+                self.cond.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self.cond:
+            self.writers_waiting += 1
+            while self.writer or self.readers:
+                self.cond.wait()
+            self.writers_waiting -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.writer = False
+                self.cond.notify_all()
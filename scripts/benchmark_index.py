@@ -0,0 +1,110 @@
+# scripts/benchmark_index.py
+#
+# Compare FAISS backends for BasicRetriever on the HotpotQA corpus.
+#
+# Usage:
+#   python -m scripts.benchmark_index --top-k 2 5 --backends flat_ip ivf hnsw ivfpq
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from rag.retriever import BasicRetriever
+from rag.indexes import INDEX_TYPES, build_index, index_memory_bytes
+
+
+def recall_at_k(exact_ids, approx_ids):
+    """
+    Fraction of the exact top-k neighbours also returned by the approximate index.
+    """
+    k = exact_ids.shape[1]
+    hits = sum(
+        len(set(exact_row) & set(approx_row))
+        for exact_row, approx_row in zip(exact_ids.tolist(), approx_ids.tolist())
+    )
+    return hits / (k * len(exact_ids))
+
+
+def benchmark_backend(index_type, embeddings, queries, top_k, index_params, exact_ids):
+    """
+    Build one backend and measure build time, memory, per-query latency and recall@k.
+    """
+    start = time.perf_counter()
+    index = build_index(embeddings, index_type, index_params)
+    build_time = time.perf_counter() - start
+
+    # Per-query latency, measured one query at a time as in the API
+    latencies = []
+    approx_ids = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ind = index.search(query[None, :], top_k)
+        latencies.append(time.perf_counter() - start)
+        approx_ids.append(ind[0])
+
+    latencies = np.array(latencies) * 1000
+
+    return {
+        "backend": index_type,
+        "top_k": top_k,
+        "recall": recall_at_k(exact_ids, np.array(approx_ids)),
+        "latency_ms_mean": float(latencies.mean()),
+        "latency_ms_p95": float(np.percentile(latencies, 95)),
+        "memory_mb": index_memory_bytes(index) / 1e6,
+        "build_s": build_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency benchmark of FAISS backends.")
+    parser.add_argument("--data", default="data/hotpotqa_300.pkl")
+    parser.add_argument("--cache-dir", default="data/index_cache")
+    parser.add_argument("--backends", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--top-k", nargs="+", type=int, default=[2, 5, 10])
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--pq-m", type=int, default=16)
+    args = parser.parse_args()
+
+    with open(args.data, "rb") as f:
+        dataset = pickle.load(f)
+
+    # Reuse the retriever (and its cache) to get normalized chunk embeddings
+    retriever = BasicRetriever(dataset, cache_dir=args.cache_dir)
+    embeddings = np.ascontiguousarray(retriever.embeddings, dtype=np.float32)
+
+    questions = [example["question"] for example in dataset]
+    queries = retriever.model_for_rag.encode(questions, convert_to_numpy=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    queries = queries.astype(np.float32)
+
+    index_params = {
+        "nprobe": args.nprobe,
+        "ef_search": args.ef_search,
+        "pq_m": args.pq_m,
+    }
+
+    print(f"Corpus: {len(embeddings)} chunks, {len(queries)} queries, dim={embeddings.shape[1]}")
+    print(f"{'backend':<10}{'k':>4}{'recall@k':>10}{'mean ms':>10}{'p95 ms':>10}{'mem MB':>10}{'build s':>10}")
+
+    # Ground truth comes from the exact inner-product index
+    reference = build_index(embeddings, "flat_ip")
+
+    for top_k in args.top_k:
+        _, exact_ids = reference.search(queries, top_k)
+
+        for index_type in args.backends:
+            result = benchmark_backend(
+                index_type, embeddings, queries, top_k, index_params, exact_ids
+            )
+            print(
+                f"{result['backend']:<10}{result['top_k']:>4}{result['recall']:>10.3f}"
+                f"{result['latency_ms_mean']:>10.3f}{result['latency_ms_p95']:>10.3f}"
+                f"{result['memory_mb']:>10.2f}{result['build_s']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
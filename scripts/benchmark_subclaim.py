@@ -0,0 +1,93 @@
+# scripts/benchmark_subclaim.py
+#
+# Microbenchmark of claim classification + decomposition on the
+# evaluation claims: rule-by-rule regex calls (previous approach) vs the
+# single-pass rule table, cold and memoized, and the batch API.
+#
+# Usage:
+#   python -m scripts.benchmark_subclaim --repeat 200 --passages 2
+
+import argparse
+import re
+import time
+
+from nli.subclaim import (
+    COMPARATIVE_PATTERNS, RULES, analyze_claim, decompose_many, subclaims_of
+)
+from scripts.run_experiments import claims
+
+
+def sequential_subclaims(claim):
+    """
+    Previous approach: up to five re.search calls to classify the claim,
+    then up to five re.match calls to decompose it.
+    """
+    if not any(re.search(pattern, claim, re.IGNORECASE) for pattern in COMPARATIVE_PATTERNS):
+        return [claim]
+
+    for _, pattern, builder in RULES:
+        match = re.match("^" + pattern, claim, re.IGNORECASE)
+        if match:
+            return builder(claim, *map(str.strip, match.groups()))
+
+    return [claim]
+
+
+def rule_table_subclaims(claim):
+    return list(subclaims_of(claim)) if analyze_claim(claim).comparative else [claim]
+
+
+def clear_caches():
+    analyze_claim.cache_clear()
+    subclaims_of.cache_clear()
+
+
+def time_calls(fn, calls, repeat, clear=None):
+    """
+    Microseconds per call of fn over calls, best of repeat rounds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if clear is not None:
+            clear()
+        start = time.perf_counter()
+        fn(calls)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark of claim decomposition.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--passages", type=int, default=2, help="Calls per claim (one per retrieved passage)")
+    args = parser.parse_args()
+
+    # Same call pattern as per-passage filtering: each claim once per passage
+    calls = [claim for claim in claims for _ in range(args.passages)]
+
+    expected = [sequential_subclaims(claim) for claim in calls]
+    assert [rule_table_subclaims(claim) for claim in calls] == expected
+    assert decompose_many(calls) == expected
+    rules = sum(analyze_claim(claim).rule is not None for claim in claims)
+    print(f"{len(claims)} claims, {rules} decomposed by a rule, {len(calls)} calls, outputs identical")
+
+    rows = [
+        ("sequential re calls", time_calls(
+            lambda cs: [sequential_subclaims(c) for c in cs], calls, args.repeat)),
+        ("rule table, cold", time_calls(
+            lambda cs: [rule_table_subclaims(c) for c in cs], calls, args.repeat,
+            clear=clear_caches)),
+        ("rule table, memoized", time_calls(
+            lambda cs: [rule_table_subclaims(c) for c in cs], calls, args.repeat)),
+        ("decompose_many, cold", time_calls(
+            decompose_many, calls, args.repeat, clear=clear_caches)),
+    ]
+
+    baseline = rows[0][1]
+    print(f"{'method':<24}{'us/call':>10}{'speedup':>10}")
+    for name, us in rows:
+        print(f"{name:<24}{us:>10.2f}{baseline / us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
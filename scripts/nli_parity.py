@@ -0,0 +1,118 @@
+# scripts/nli_parity.py
+#
+# Compare the quantized / ONNX NLI backends against the fp32 PyTorch model
+# on the (passage, claim) pairs of the evaluation set.
+#
+# Usage:
+#   python -m scripts.nli_parity --backends quantized onnx --size 100
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from rag.retriever import BasicRetriever
+from nli.nli_class import NLIModel
+from nli.subclaim import is_comparative_claim, decompose_comparative_claim
+from scripts.run_experiments import claims
+
+
+ENTAILMENT = 2
+
+
+def evaluation_pairs(retriever, dataset, size, top_k):
+    """
+    (passage, claim) and (passage, sub-claim) pairs scored by the NLI pipelines.
+    """
+    questions = [dataset[n]["question"] for n in range(size)]
+    passages_list, _, _ = retriever.retriever_chunk_batch(questions, top_k)
+
+    pairs = []
+    for claim, passages in zip(claims[:size], passages_list):
+        hypotheses = [claim]
+        if is_comparative_claim(claim):
+            hypotheses += decompose_comparative_claim(claim)
+        pairs.extend((premise, hypothesis) for premise in passages for hypothesis in hypotheses)
+
+    # Same pair may come from several questions, score it once
+    return list(dict.fromkeys(pairs))
+
+
+def run_backend(backend, pairs):
+    """
+    Score all pairs without cache; return (label, score, probs) and timings.
+    """
+    nli_model = NLIModel(cache_size=0, backend=backend)
+    nli_model.predict(pairs[:1])  # warm-up
+
+    start = time.perf_counter()
+    results = nli_model.predict(pairs)
+    elapsed = time.perf_counter() - start
+
+    return results, elapsed, nli_model.size_bytes()
+
+
+def compare(reference, candidate, threshold):
+    """
+    Label agreement, keep-decision agreement and entailment score drift.
+    """
+    ref_labels = np.array([label for label, _, _ in reference])
+    cand_labels = np.array([label for label, _, _ in candidate])
+    ref_entail = np.array([probs[ENTAILMENT] for _, _, probs in reference])
+    cand_entail = np.array([probs[ENTAILMENT] for _, _, probs in candidate])
+
+    # Same rule as NLIModel.is_entailed, vectorized
+    ref_keep = (ref_labels == ENTAILMENT) & (ref_entail > threshold)
+    cand_keep = (cand_labels == ENTAILMENT) & (cand_entail > threshold)
+    drift = np.abs(ref_entail - cand_entail)
+
+    return {
+        "label_agreement": float((ref_labels == cand_labels).mean()),
+        "decision_agreement": float((ref_keep == cand_keep).mean()),
+        "entailment_drift_mean": float(drift.mean()),
+        "entailment_drift_max": float(drift.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity and speed of NLI backends vs fp32 PyTorch.")
+    parser.add_argument("--data", default="data/hotpotqa_300.pkl")
+    parser.add_argument("--backends", nargs="+", default=["quantized", "onnx"], choices=["quantized", "onnx"])
+    parser.add_argument("--size", type=int, default=len(claims))
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--threshold", type=float, default=0.60)
+    args = parser.parse_args()
+
+    with open(args.data, "rb") as f:
+        dataset = pickle.load(f)
+
+    retriever = BasicRetriever(dataset, cache_dir="data/index_cache")
+    pairs = evaluation_pairs(retriever, dataset, min(args.size, len(claims)), args.top_k)
+    print(f"{len(pairs)} evaluation pairs")
+
+    reference, ref_time, ref_size = run_backend("torch", pairs)
+    rows = [("torch", None, ref_time, ref_size)]
+
+    for backend in args.backends:
+        candidate, elapsed, size = run_backend(backend, pairs)
+        rows.append((backend, compare(reference, candidate, args.threshold), elapsed, size))
+
+    print(f"{'backend':<10}{'label agr':>10}{'keep agr':>10}{'drift mean':>12}{'drift max':>11}"
+          f"{'ms/pair':>9}{'speedup':>9}{'size MB':>9}")
+    for backend, parity, elapsed, size in rows:
+        parity = parity or {
+            "label_agreement": 1.0,
+            "decision_agreement": 1.0,
+            "entailment_drift_mean": 0.0,
+            "entailment_drift_max": 0.0,
+        }
+        print(
+            f"{backend:<10}{parity['label_agreement']:>10.3f}{parity['decision_agreement']:>10.3f}"
+            f"{parity['entailment_drift_mean']:>12.4f}{parity['entailment_drift_max']:>11.4f}"
+            f"{1000 * elapsed / len(pairs):>9.1f}{ref_time / elapsed:>9.2f}{size / 1e6:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # scripts/run_experiments.py
 
+import argparse
 import pickle
 
 from datasets import load_dataset
@@ -13,6 +14,8 @@ from pipelines.rag_nli import RAG_NLI
 from pipelines.rag_nli_subclaim import RAG_NLI_Subclaim
 
 from evaluation.evaluate import evaluate_pipeline, run_experiment
+from evaluation.sharded import run_sharded_experiment
+from evaluation.checkpoint import run_checkpointed_experiment
 
 
 
@@ -122,25 +125,90 @@ claims = [
     "Yingkou and Fuding are the same level of city.",
 ]
 
-# Load dataset from pickle
-
-with open('data/hotpotqa_300.pkl', 'rb') as f:
-    ds_100 = pickle.load(f)
-
-
-basic_retriever = BasicRetriever(ds_100)
-nli_model = NLIModel()
-generator = Generator(model_name = "google/flan-t5-small")
-
-
-# Load three pipelines to compare
-
-rag_pipeline = RAGBaseline(basic_retriever, generator)
-
-rag_nli_pipeline = RAG_NLI(basic_retriever, generator, nli_model) 
-
-rag_nli_sub_pipeline = RAG_NLI_Subclaim(basic_retriever, generator, nli_model)
-
-
-
-print(run_experiment(ds_100,claims,rag_pipeline, rag_nli_pipeline, rag_nli_sub_pipeline))
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="Compare RAG, RAG+NLI and RAG+NLI+Subclaim on HotpotQA.")
+    parser.add_argument("--size", type=int, default=100, help="Number of evaluation examples")
+    parser.add_argument("--batched", action="store_true", help="Run each stage for the whole evaluation set at once")
+    parser.add_argument("--shared", action="store_true", help="Retrieve once and deduplicate prompts across pipelines")
+    parser.add_argument("--nli-backend", default="torch", choices=["torch", "quantized", "onnx"], help="NLI inference backend")
+    parser.add_argument("--nli-cascade", default=None, help="Small NLI model scoring pairs before bart-large-mnli")
+    parser.add_argument("--nli-max-premise-tokens", type=int, default=None, help="Premise truncation budget for NLI")
+    parser.add_argument("--shards", type=int, default=1, help="Worker processes splitting the questions (1 = serial)")
+    parser.add_argument("--log", default=None, help="Per-example JSONL log; examples already logged are skipped")
+    parser.add_argument("--log-batch-size", type=int, default=1, help="Examples computed and logged together with --log")
+    args = parser.parse_args()
+
+    if args.shards > 1 and args.shared:
+        parser.error("--shared cannot be combined with --shards")
+    if args.log and (args.shards > 1 or args.shared):
+        parser.error("--log cannot be combined with --shards or --shared")
+
+    # Load dataset from pickle
+
+    with open('data/hotpotqa_300.pkl', 'rb') as f:
+        ds_100 = pickle.load(f)
+
+
+    basic_retriever = BasicRetriever(ds_100, cache_dir="data/index_cache")
+    nli_model = NLIModel(
+        cache_path="data/nli_cache.sqlite",
+        backend=args.nli_backend,
+        cascade_model=args.nli_cascade,
+        max_premise_tokens=args.nli_max_premise_tokens
+    )
+    generator = Generator(model_name = "google/flan-t5-small")
+
+
+    # Load three pipelines to compare
+
+    rag_pipeline = RAGBaseline(basic_retriever, generator)
+
+    rag_nli_pipeline = RAG_NLI(basic_retriever, generator, nli_model)
+
+    rag_nli_sub_pipeline = RAG_NLI_Subclaim(basic_retriever, generator, nli_model)
+
+
+
+    if args.size > len(claims):
+        print(
+            f"Only {len(claims)} claims: RAG_NLI and RAG_NLI_SUBCLAIM are evaluated on "
+            f"at most {len(claims)} examples, RAG on up to {args.size}"
+        )
+
+    if args.log:
+        results = run_checkpointed_experiment(
+            ds_100, claims, rag_pipeline, rag_nli_pipeline, rag_nli_sub_pipeline,
+            args.log, size=args.size, batch_size=args.log_batch_size
+        )
+    elif args.shards > 1:
+        # Workers are forked from this process and share the loaded models
+        results = run_sharded_experiment(
+            ds_100,
+            claims,
+            {
+                "RAG": (rag_pipeline, rag_pipeline.uses_claims),
+                "RAG_NLI": (rag_nli_pipeline, rag_nli_pipeline.uses_claims),
+                "RAG_NLI_SUBCLAIM": (rag_nli_sub_pipeline, rag_nli_sub_pipeline.uses_claims),
+            },
+            size=args.size, num_shards=args.shards, batched=args.batched
+        )
+    else:
+        results = run_experiment(
+            ds_100, claims, rag_pipeline, rag_nli_pipeline, rag_nli_sub_pipeline,
+            size=args.size, batched=args.batched, shared=args.shared
+        )
+
+    print(results)
+    for name in ("RAG", "RAG_NLI", "RAG_NLI_SUBCLAIM"):
+        print(f"{name}: evaluated on {results[name]['size']} examples")
+
+    # With --shards the NLI work runs in the workers, whose counters are in the SHARDS results
+    if args.shards <= 1:
+        print("NLI cache:", nli_model.cache.stats())
+        print("NLI filter:", nli_model.filter_stats)
+        if nli_model.cascade is not None:
+            print("NLI cascade:", nli_model.cascade.stats())
+
+
+if __name__ == "__main__":
+    main()
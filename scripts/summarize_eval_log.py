@@ -0,0 +1,24 @@
+# scripts/summarize_eval_log.py
+#
+# Recompute the metrics of every pipeline configuration in a per-example
+# evaluation log written by run_experiments --log, without running any pipeline.
+#
+# Usage:
+#   python -m scripts.summarize_eval_log data/eval_log.jsonl
+
+import argparse
+import json
+
+from evaluation.checkpoint import summarize_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate metrics from an evaluation log.")
+    parser.add_argument("log")
+    args = parser.parse_args()
+
+    print(json.dumps(summarize_log(args.log), indent=2))
+
+
+if __name__ == "__main__":
+    main()
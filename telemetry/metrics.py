@@ -0,0 +1,177 @@
+import bisect
+import math
+import threading
+
+
+# Latency buckets in seconds, from a cache hit to a full LLM analysis
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Counter:
+    """
+    Monotonic counter, one value per combination of label values.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [
+                (self.name, _format_labels(self.labels, key), value)
+                for key, value in sorted(self.values.items())
+            ]
+
+
+class Histogram:
+    """
+    Cumulative histogram (Prometheus semantics: _bucket, _sum, _count),
+    one series per combination of label values.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [bucket counts, sum, count]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, key, [("le", _format_value(bound))])
+                    samples.append((f"{self.name}_bucket", labels, cumulative))
+                labels = _format_labels(self.labels, key)
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time (e.g. queue length).
+    The callback returns a number, or a dict {label value: number}
+    for a gauge with one label.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, help, fn, labels=()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labels = tuple(labels)
+
+    def samples(self):
+        value = self.fn()
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [
+                (self.name, _format_labels(self.labels, (key,)), v)
+                for key, v in sorted(value.items())
+            ]
+        return [(self.name, "", value)]
+
+
+class Registry:
+    """
+    Set of metrics rendered together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, labels=()):
+        return self._register(Gauge(name, help, fn, labels))
+
+    def render(self):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # A failing gauge callback must not break the whole scrape
+                print(f"Metric {metric.name} skipped: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry, exposed by the API at /metrics
+REGISTRY = Registry()
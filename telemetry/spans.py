@@ -0,0 +1,121 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import REGISTRY
+
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_seconds",
+    "Latency of pipeline stages and model calls",
+    labels=("stage",),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "rag_stage_errors_total",
+    "Pipeline stages and model calls that raised",
+    labels=("stage",),
+)
+ITEMS = REGISTRY.counter(
+    "rag_items_total",
+    "Items processed: NLI pairs, tokens in and out, retrieval queries",
+    labels=("kind",),
+)
+
+# Breakdown of the request being served, if one was asked for
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Per-request timing breakdown: seconds and calls per stage, plus item counts.
+
+    Spans record into the trace of their context. Work sent to other
+    threads records into it only if the context is propagated
+    (see api.inference.InferencePool.run).
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+
+    def add_count(self, kind, amount):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + amount
+
+    def summary(self):
+        with self.lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self.start, 6),
+                "stages": {
+                    stage: {"seconds": round(entry["seconds"], 6), "calls": entry["calls"]}
+                    for stage, entry in self.stages.items()
+                },
+                "counts": dict(self.counts),
+            }
+
+
+@contextmanager
+def trace():
+    """
+    Collect a timing breakdown of everything run in this context.
+    """
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a block into the rag_stage_seconds histogram
+    and into the current request trace, if any.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        current = _current_trace.get()
+        if current is not None:
+            current.add_span(stage, elapsed)
+
+
+def timed(stage):
+    """
+    Decorator timing every call of a function as a span.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(kind, amount=1):
+    """
+    Count processed items (e.g. "nli_pairs", "generator_tokens_in").
+    """
+    if amount:
+        ITEMS.inc(amount, kind=kind)
+        current = _current_trace.get()
+        if current is not None:
+            current.add_count(kind, amount)